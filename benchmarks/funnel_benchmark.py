@@ -0,0 +1,166 @@
+"""
+Load test of the booking funnel: search -> hotel details -> prebook -> book,
+driven over HTTP against a running Odoo with N concurrent website users.
+
+Start the LiteAPI stand-in (benchmarks/mock_liteapi.py) and point
+liteapi.base_url / liteapi.booking_base_url at it first, so no real quota
+is spent. Raise or disable the rate limits for the run
+(liteapi.ratelimit_enabled = False), or most requests will get 429.
+
+    python3 benchmarks/funnel_benchmark.py --url http://localhost:8069 --city-id 1 \
+        --users 20 --iterations 5 --metrics-token <liteapi.metrics_token>
+
+Each user has its own session and runs --iterations funnels. The report
+gives throughput and p50/p95/p99 latency per step. With --metrics-token,
+SQL queries per request are read from /liteapi/metrics before and after
+the run. Those counters are per Odoo worker, so run Odoo with --workers=0
+(or a single worker) for exact SQL numbers.
+"""
+import argparse
+import http.cookiejar
+import math
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+STEPS = ('search', 'details', 'prebook', 'book')
+ROUTES = {'search': '/hotel/results', 'details': '/booking/view', 'prebook': '/hotel/prebook', 'book': '/booking/confirm'}
+
+HOTEL_LINK_RE = re.compile(r'/booking/view/([^"\'#?/]+)')
+INPUT_RE = r'name="{}"[^>]*?value="([^"]*)"'
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class FunnelUser:
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect())
+
+    def call(self, path, data=None):
+        """ Returns (status, body, location, seconds) """
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        started = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data=body, timeout=self.timeout) as response:
+                status, text, location = response.status, response.read().decode('utf-8', 'replace'), None
+        except urllib.error.HTTPError as e:
+            status, text, location = e.code, e.read().decode('utf-8', 'replace'), e.headers.get('Location')
+        return status, text, location, time.perf_counter() - started
+
+    def run_funnel(self, args, checkin, checkout):
+        """ (step, seconds, ok) rows for one funnel; stops at the first failed step """
+        results = []
+        status, text, _location, seconds = self.call('/hotel/results', {
+            'search_type': 'city', 'city_id': args.city_id,
+            'checkin': checkin, 'checkout': checkout, 'guests': args.guests,
+        })
+        hotel_ids = HOTEL_LINK_RE.findall(text) if status == 200 else []
+        results.append(('search', seconds, bool(hotel_ids)))
+        if not hotel_ids:
+            return results
+
+        hotel_id = hotel_ids[0]
+        status, text, _location, seconds = self.call(f'/booking/view/{urllib.parse.quote(hotel_id)}')
+        offer = re.search(INPUT_RE.format('offer_id'), text) if status == 200 else None
+        price = re.search(INPUT_RE.format('price'), text) if status == 200 else None
+        results.append(('details', seconds, bool(offer)))
+        if not offer:
+            return results
+
+        status, _text, location, seconds = self.call('/hotel/prebook', {
+            'hotel_lite_id': hotel_id, 'offer_id': offer.group(1), 'price': price.group(1) if price else '',
+            'checkin': checkin, 'checkout': checkout, 'guests': args.guests,
+        })
+        prebooked = status in (302, 303) and (location or '').endswith('/hotel/checkout')
+        results.append(('prebook', seconds, prebooked))
+        if not prebooked or args.skip_book:
+            return results
+
+        status, text, _location, seconds = self.call('/booking/confirm', {})
+        results.append(('book', seconds, status == 200 and 'Booking Error' not in text))
+        return results
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # nearest-rank
+    return ordered[max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)]
+
+
+def read_sql_counters(base_url, token):
+    """ {route: (sum, count)} of the liteapi_route_sql_queries histogram """
+    request = urllib.request.Request(base_url.rstrip('/') + '/liteapi/metrics', headers={'Authorization': f'Bearer {token}'})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        text = response.read().decode()
+    counters = {}
+    for kind, route, value in re.findall(r'liteapi_route_sql_queries_(sum|count)\{route="([^"]+)"\} (\S+)', text):
+        total, count = counters.get(route, (0.0, 0.0))
+        counters[route] = (total + float(value), count) if kind == 'sum' else (total, count + float(value))
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8069')
+    parser.add_argument('--city-id', required=True)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--guests', type=int, default=2)
+    parser.add_argument('--days-ahead', type=int, default=30)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--skip-book', action='store_true', help='stop after prebook')
+    parser.add_argument('--metrics-token', help='liteapi.metrics_token, to report SQL queries per request')
+    args = parser.parse_args()
+
+    checkin = date.today() + timedelta(days=args.days_ahead)
+    checkout = checkin + timedelta(days=2)
+    sql_before = read_sql_counters(args.url, args.metrics_token) if args.metrics_token else {}
+
+    def user_session(_index):
+        user = FunnelUser(args.url, args.timeout)
+        rows = []
+        for _ in range(args.iterations):
+            rows.extend(user.run_funnel(args, str(checkin), str(checkout)))
+        return rows
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        rows = [row for rows in executor.map(user_session, range(args.users)) for row in rows]
+    elapsed = time.perf_counter() - started
+    sql_after = read_sql_counters(args.url, args.metrics_token) if args.metrics_token else {}
+
+    funnels = args.users * args.iterations
+    completed = sum(1 for step, _s, ok in rows if ok and step == ('prebook' if args.skip_book else 'book'))
+    print(f"users: {args.users}  funnels: {funnels}  completed: {completed}  wall: {elapsed:.1f}s")
+    print(f"throughput: {completed / elapsed:.2f} funnels/s, {len(rows) / elapsed:.2f} requests/s")
+    print(f"{'step':8} {'reqs':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'SQL/req':>8}")
+    for step in STEPS:
+        timings = [seconds * 1000 for name, seconds, _ok in rows if name == step]
+        if not timings:
+            continue
+        errors = sum(1 for name, _s, ok in rows if name == step and not ok)
+        route = ROUTES[step]
+        sql = ''
+        if route in sql_after:
+            total = sql_after[route][0] - sql_before.get(route, (0.0, 0.0))[0]
+            count = sql_after[route][1] - sql_before.get(route, (0.0, 0.0))[1]
+            sql = f"{total / count:.1f}" if count else ''
+        print(f"{step:8} {len(timings):6d} {errors:6d} {percentile(timings, 50):9.1f} "
+              f"{percentile(timings, 95):9.1f} {percentile(timings, 99):9.1f} {sql:>8}")
+
+
+if __name__ == '__main__':
+    main()
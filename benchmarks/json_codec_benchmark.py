@@ -0,0 +1,132 @@
+"""
+Micro-benchmark of liteapi_booking/services/json_codec.py against the stdlib
+json module, on the JSON handled per search/booking request.
+
+    python3 benchmarks/json_codec_benchmark.py --hotels 100
+
+Payloads are built from the recorded responses in benchmarks/fixtures/
+(or --fixtures DIR): a /hotels/rates response for --hotels hotels (the
+recorded items re-keyed, as the mock server does), the matching request
+body, a /rates/book request with Arabic guest names, the search cache
+entry (result cards) and booking_details. Each case reports the best of
+--repeat runs in microseconds per call. Without orjson installed the codec
+falls back to the stdlib and the speedup is ~1x.
+
+Before timing, every dumps case is checked to produce the same UTF-8 wire
+bytes as the stdlib with the codec's pinned format (compact separators,
+non-ASCII kept as-is), so the output does not depend on the backend.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CODEC_PATH = os.path.join(BENCH_DIR, os.pardir, 'liteapi_booking', 'services', 'json_codec.py')
+
+sys.path.insert(0, BENCH_DIR)
+from mock_liteapi import FIXTURES_DIR, build_rates  # noqa: E402
+
+
+def load_codec():
+    # loaded by path: importing the addon package would require Odoo
+    spec = importlib.util.spec_from_file_location('json_codec', CODEC_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_fixture(fixtures_dir, name):
+    with open(os.path.join(fixtures_dir, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build_cases(fixtures_dir, hotels):
+    hotel_ids = [f"lp{n:06d}" for n in range(hotels)]
+    rates = build_rates(load_fixture(fixtures_dir, 'hotels_rates.json'), hotel_ids)
+    request = {
+        "occupancies": [{"adults": 2}], "checkin": "2026-11-01", "checkout": "2026-11-03",
+        "currency": "SAR", "guestNationality": "SA", "roomMapping": True, "language": "ar",
+        "hotelIds": hotel_ids,
+    }
+    guest = {"firstName": "محمد", "lastName": "العتيبي", "email": "guest@example.com"}
+    book_request = {
+        "prebookId": "pb_bench", "payment": {"method": "TRANSACTION_ID", "transactionId": "tx_bench"},
+        "holder": guest, "guests": [dict(guest, occupancyNumber=1)], "clientReference": "odoo-bench",
+    }
+    cards = {'hotels': [{
+        'id': index + 1,
+        'liteapi_id': item['hotelId'],
+        'name': item.get('name') or f"فندق {index}",
+        'price': 640.0 + index,
+        'currency': 'SAR',
+        'star_rating': 4,
+        'image_url': item.get('main_photo') or '/web/static/src/img/placeholder.png',
+        'short_description': "فندق قريب من وسط المدينة مع إطلالة على البحر ومسبح خارجي وخدمة نقل من المطار...",
+        'address': item.get('address'),
+        'review_score': 8.6,
+        'taxes_included': True,
+    } for index, item in enumerate(rates['data'])]}
+    booking = load_fixture(fixtures_dir, 'rates_book.json').get('data') or {}
+
+    rates_text = json.dumps(rates)
+    cards_text = json.dumps(cards)
+    booking_text = json.dumps(booking)
+    return [
+        # (case, call(json module), payload bytes)
+        ('rates response loads', lambda m: m.loads(rates_text), len(rates_text.encode())),
+        ('rates request dumps', lambda m: m.dumps(request), len(json.dumps(request))),
+        ('book request dumps', lambda m: m.dumps(book_request), len(pinned_dumps(book_request).encode())),
+        ('search cache dumps', lambda m: m.dumps(cards), len(cards_text.encode())),
+        ('search cache loads', lambda m: m.loads(cards_text), len(cards_text.encode())),
+        ('booking_details dumps', lambda m: m.dumps(booking), len(booking_text.encode())),
+        ('booking_details loads', lambda m: m.loads(booking_text), len(booking_text.encode())),
+    ]
+
+
+def pinned_dumps(obj):
+    # the format json_codec.dumps emits with either backend
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def same_data(left, right):
+    if isinstance(left, str):
+        return json.loads(left) == json.loads(right)
+    return left == right
+
+
+class WireFormat:
+    dumps = staticmethod(pinned_dumps)
+
+
+def best_time(func, repeat):
+    timer = timeit.Timer(func)
+    number, _elapsed = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--hotels', type=int, default=100, help='hotels in the rates response and search result')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    codec = load_codec()
+    print(f"codec backend: {codec.BACKEND}")
+    print(f"{'case':24} {'bytes':>9} {'stdlib us':>10} {'codec us':>10} {'speedup':>8}")
+    for name, call, size in build_cases(args.fixtures, args.hotels):
+        # stdlib json.dumps spaces and escapes differently; both must decode to the same data
+        assert same_data(call(codec), call(json)), name
+        if name.endswith('dumps'):
+            # what is sent upstream and stored: identical bytes whichever backend is installed
+            assert call(codec).encode('utf-8') == call(WireFormat).encode('utf-8'), name
+        stdlib = best_time(lambda: call(json), args.repeat)
+        fast = best_time(lambda: call(codec), args.repeat)
+        print(f"{name:24} {size:9d} {stdlib * 1e6:10.1f} {fast * 1e6:10.1f} {stdlib / fast:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
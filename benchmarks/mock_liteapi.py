@@ -0,0 +1,230 @@
+"""
+Local stand-in for the LiteAPI search and booking servers, for load tests
+that must not spend real API quota.
+
+    python3 benchmarks/mock_liteapi.py --port 8765 --latency-ms 150 --jitter-ms 50 --error-rate 0.02
+
+Then point the module at it (Settings > Technical > System Parameters):
+
+    liteapi.base_url          http://127.0.0.1:8765/v3.0
+    liteapi.booking_base_url  http://127.0.0.1:8765/v3.0
+
+Responses come from the recorded payloads in benchmarks/fixtures/ (or
+--fixtures DIR). Every item in a rates fixture is used as a template and
+re-keyed with the hotelIds of the request, so any city works. Prebook
+and book return fresh ids per call, and book is idempotent on
+clientReference like the real API. Responses are gzip- or brotli-encoded
+when the request's Accept-Encoding allows it (--no-compression to disable;
+brotli needs the brotli package). Use --tls-cert/--tls-key to serve HTTPS.
+Request counts per endpoint are printed on Ctrl+C.
+"""
+import argparse
+import copy
+import gzip
+import json
+import os
+import random
+import ssl
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# endpoint -> (method, fixture file)
+ENDPOINTS = {
+    '/hotels/rates': ('POST', 'hotels_rates.json'),
+    '/hotels/min-rates': ('POST', 'hotels_min_rates.json'),
+    '/data/hotel': ('GET', 'data_hotel.json'),
+    '/data/hotels': ('GET', 'data_hotels.json'),
+    '/rates/prebook': ('POST', 'rates_prebook.json'),
+    '/rates/book': ('POST', 'rates_book.json'),
+}
+
+
+class MockState:
+
+    def __init__(self, fixtures_dir, latency_ms, jitter_ms, error_rate, error_status, compression=True):
+        self.fixtures = {}
+        for endpoint, (_method, filename) in ENDPOINTS.items():
+            with open(os.path.join(fixtures_dir, filename), encoding='utf-8') as f:
+                self.fixtures[endpoint] = json.load(f)
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.compression = compression
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.bookings = {}  # clientReference -> book response
+
+    def count(self, endpoint, status):
+        with self.lock:
+            key = (endpoint, status)
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def build_rates(fixture, hotel_ids):
+    """ One copy of a recorded item per requested hotelId (cycling through the templates) """
+    templates = fixture.get('data') or []
+    if not templates or not hotel_ids:
+        return {'data': copy.deepcopy(templates)}
+    items = []
+    for index, hotel_id in enumerate(hotel_ids):
+        item = copy.deepcopy(templates[index % len(templates)])
+        item['hotelId'] = hotel_id
+        for room in item.get('roomTypes', []) or []:
+            for rate in room.get('rates', []) or []:
+                rate['offerId'] = f"{rate.get('offerId', 'offer')}-{hotel_id}"
+        if 'offerId' in item:
+            item['offerId'] = f"{item['offerId']}-{hotel_id}"
+        items.append(item)
+    return {'data': items}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    state = None
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        endpoint = next((e for e in ENDPOINTS if parsed.path.endswith(e)), None)
+        if endpoint is None or ENDPOINTS[endpoint][0] != method:
+            return self._reply(endpoint or parsed.path, 404, {'error': {'code': 404, 'message': 'Not found'}})
+
+        state = self.state
+        delay = max(0.0, random.gauss(state.latency, state.jitter)) if state.jitter else state.latency
+        time.sleep(delay)
+        if state.error_rate and random.random() < state.error_rate:
+            headers = {'Retry-After': '1'} if state.error_status == 429 else {}
+            return self._reply(endpoint, state.error_status, {'error': {'code': state.error_status, 'message': 'Injected error'}}, headers)
+
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return self._reply(endpoint, 400, {'error': {'code': 400, 'message': 'Invalid JSON'}})
+        self._reply(endpoint, 200, self._response(endpoint, payload, parse_qs(parsed.query)))
+
+    def _response(self, endpoint, payload, query):
+        fixture = self.state.fixtures[endpoint]
+        if endpoint in ('/hotels/rates', '/hotels/min-rates'):
+            return build_rates(fixture, payload.get('hotelIds') or [])
+        if endpoint == '/data/hotel':
+            data = copy.deepcopy(fixture)
+            hotel_id = (query.get('hotelId') or [None])[0]
+            if hotel_id:
+                data['data']['id'] = hotel_id
+            return data
+        if endpoint == '/data/hotels':
+            offset = int((query.get('offset') or [0])[0])
+            limit = int((query.get('limit') or [1000])[0])
+            template = fixture['data'][0]
+            # a finite catalog (3 pages) so a catalog sync completes
+            total = 3 * limit
+            return {'data': [
+                dict(template, id=f"mock{n:06d}", name=f"{template['name']} {n}")
+                for n in range(offset, min(offset + limit, total))
+            ]}
+        if endpoint == '/rates/prebook':
+            data = copy.deepcopy(fixture)
+            data['data'].update({
+                'prebookId': f"prebook-{uuid.uuid4().hex[:12]}",
+                'transactionId': f"tr-{uuid.uuid4().hex[:12]}",
+                'offerId': payload.get('offerId') or data['data'].get('offerId'),
+            })
+            return data
+        # /rates/book: the same clientReference returns the same booking
+        reference = payload.get('clientReference') or uuid.uuid4().hex
+        with self.state.lock:
+            if reference not in self.state.bookings:
+                data = copy.deepcopy(fixture)
+                data['data'].update({'bookingId': f"BK{uuid.uuid4().hex[:10].upper()}", 'clientReference': reference})
+                self.state.bookings[reference] = data
+            return self.state.bookings[reference]
+
+    def _content_encoding(self):
+        if not self.state.compression:
+            return None
+        accepted = {part.split(';')[0].strip().lower() for part in self.headers.get('Accept-Encoding', '').split(',')}
+        if 'br' in accepted and brotli is not None:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def _reply(self, endpoint, status, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        encoding = self._content_encoding()
+        if encoding == 'br':
+            body = brotli.compress(body, quality=5)
+        elif encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=6)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.state.count(endpoint, status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--latency-ms', type=float, default=150.0, help='mean response latency')
+    parser.add_argument('--jitter-ms', type=float, default=50.0, help='latency standard deviation')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--no-compression', action='store_true', help='ignore Accept-Encoding and always reply uncompressed')
+    parser.add_argument('--tls-cert')
+    parser.add_argument('--tls-key')
+    args = parser.parse_args()
+
+    MockHandler.state = MockState(
+        args.fixtures, args.latency_ms, args.jitter_ms, args.error_rate, args.error_status,
+        compression=not args.no_compression,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    scheme = 'http'
+    if args.tls_cert:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(args.tls_cert, args.tls_key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = 'https'
+    print(f"Mock LiteAPI listening on {scheme}://{args.host}:{args.port}/v3.0")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for (endpoint, status), count in sorted(MockHandler.state.counts.items()):
+            print(f"{endpoint:20} {status}  {count}")
+
+
+if __name__ == '__main__':
+    main()
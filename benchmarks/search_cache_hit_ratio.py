@@ -0,0 +1,54 @@
+"""
+Hit ratio of the search cache under repeated identical searches.
+
+Run inside an Odoo shell against a database with liteapi_booking installed:
+
+    odoo-bin shell -d <db> --no-http < benchmarks/search_cache_hit_ratio.py
+
+Every EXPIRE_EVERY searches the cache row is force-expired (and the
+per-worker L1 cleared) to simulate the 90s TTL passing. Before the upsert
+fix every refresh after the first expiry failed on the cache_key unique
+constraint, so the hit ratio collapsed to 0 after the first TTL window.
+"""
+import os
+import time
+from datetime import date, timedelta
+
+from odoo.addons.liteapi_booking.services import search_service
+from odoo.addons.liteapi_booking.services.audit_queue import AUDIT_QUEUE
+
+SEARCHES = int(os.environ.get('BENCH_SEARCHES', 200))
+EXPIRE_EVERY = int(os.environ.get('BENCH_EXPIRE_EVERY', 20))
+
+env = env  # noqa: F821 -- provided by odoo-bin shell
+city = env['liteapi.city'].search([('is_active', '=', True)], limit=1)
+checkin = date.today() + timedelta(days=30)
+checkout = checkin + timedelta(days=2)
+service = env['liteapi.search.service'].sudo()
+
+
+def api_calls():
+    AUDIT_QUEUE.flush_now()
+    return env['liteapi.audit.log'].sudo().search_count([('name', '=', '/hotels/rates')])
+
+
+calls_before = api_calls()
+started = time.perf_counter()
+for i in range(SEARCHES):
+    if i and i % EXPIRE_EVERY == 0:
+        env.cr.execute(
+            "UPDATE liteapi_search_cache SET expires_at = (now() at time zone 'UTC') - interval '1 second'"
+        )
+        env['liteapi.search.cache'].invalidate_model()
+        search_service.L1_CACHE._data.clear()
+        search_service.L1_CACHE._size = 0
+    service.search_hotels('city', str(city.id), str(checkin), str(checkout), 2)
+elapsed = time.perf_counter() - started
+upstream = api_calls() - calls_before
+
+print(f"searches:        {SEARCHES}")
+print(f"upstream calls:  {upstream} (ideal {-(-SEARCHES // EXPIRE_EVERY)})")
+print(f"hit ratio:       {(SEARCHES - upstream) / SEARCHES * 100:.1f}%")
+print(f"cache stats:     {service.get_cache_stats()}")
+print(f"avg latency:     {elapsed / SEARCHES * 1000:.2f} ms")
+env.cr.rollback()
@@ -1,6 +1,6 @@
 {
     'name': 'LiteAPI Booking',
-    'version': '17.0.1.0.0',
+    'version': '17.0.1.2.0',
     'summary': 'Foundation & Safety Layer for LiteAPI Integration',
     'description': """LiteAPI Booking Module""",
     'author': 'Antigravity',
@@ -2,4 +2,5 @@ from . import portal_controller
 from . import booking_controller
 from . import search_controller
 from . import details_controller
-from . import checkout_controller
\ No newline at end of file
+from . import checkout_controller
+from . import metrics_controller
\ No newline at end of file
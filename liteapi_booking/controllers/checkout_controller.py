@@ -1,16 +1,26 @@
 from odoo import http
 from odoo.http import request
+from odoo.exceptions import UserError
 import logging
+import urllib.parse
+
+from .rate_limit import check_rate_limit
+from ..services.metrics import timed_route
 
 _logger = logging.getLogger(__name__)
 
 class LiteAPICheckoutController(http.Controller):
 
     @http.route(['/hotel/prebook'], type='http', auth="public", website=True, methods=['POST'], csrf=False)
+    @timed_route('/hotel/prebook')
     def hotel_prebook(self, **post):
         """
         يستقبل offer_id من العميل، وينفذ Prebook للحصول على مفاتيح الدفع.
         """
+        limited = check_rate_limit('prebook')
+        if limited:
+            return limited
+
         # 1. استقبال البيانات من النموذج
         offer_id = post.get('offer_id')
         hotel_lite_id = post.get('hotel_lite_id')
@@ -70,9 +80,10 @@ class LiteAPICheckoutController(http.Controller):
 
         except Exception as e:
             _logger.error(f"Prebook Controller Error: {e}")
-            # في حال الخطأ، نعود لصفحة الفندق مع رسالة خطأ
-            error_msg = str(e).replace("'", "").replace('"', "")
-            return request.redirect(f'/booking/view/{hotel_lite_id}?error={error_msg}')
+            # في حال الخطأ، نعود لصفحة الفندق مع رسالة خطأ (رسائل UserError فقط موجهة للمستخدم)
+            error_msg = e.args[0] if isinstance(e, UserError) and e.args else "Unexpected error, please try again."
+            query = urllib.parse.urlencode({'error': error_msg})
+            return request.redirect(f'/booking/view/{urllib.parse.quote(str(hotel_lite_id or ""))}?{query}')
 
     @http.route(['/hotel/checkout'], type='http', auth="public", website=True)
     def hotel_checkout(self, **kw):
@@ -97,6 +108,7 @@ class LiteAPICheckoutController(http.Controller):
         })
 
     @http.route(['/booking/confirm'], type='http', auth="public", website=True, csrf=False)
+    @timed_route('/booking/confirm')
     def booking_confirm(self, **kw):
         """
         يتم استدعاء هذا الرابط بعد نجاح عملية الدفع في الـ SDK.
@@ -11,11 +11,14 @@ except ImportError:
     except ImportError:
         def Markup(text): return text
 
+from ..services.metrics import timed_route
+
 _logger = logging.getLogger(__name__)
 
 class LiteAPIDetailsController(http.Controller):
 
     @http.route(['/booking/view/<string:hotel_lite_id>'], type='http', auth="public", website=True)
+    @timed_route('/booking/view')
     def hotel_details(self, hotel_lite_id, **kwargs):
         # 1. جلب بيانات الجلسة (للتواريخ والضيوف)
         search_params = request.session.get('liteapi_search')
@@ -42,12 +45,33 @@ class LiteAPIDetailsController(http.Controller):
             'google_maps_link': "#"
         }
 
-        # 4. جلب البيانات الحية من API ودمجها (Live Data Merge)
+        # 4. جلب البيانات الثابتة والأسعار بالتوازي (زمن الصفحة = أبطأ طلب وليس مجموعهما)
         try:
-            d_resp = client.make_request('/data/hotel', method='GET', params={
+            guests = int(search_params.get('guests', 2))
+        except (TypeError, ValueError):
+            guests = 2
+        rates_payload = {
+            "hotelIds": [hotel_lite_id],
+            "occupancies": [{"adults": guests}],
+            "checkin": search_params.get('checkin'),
+            "checkout": search_params.get('checkout'),
+            "currency": "SAR",
+            "guestNationality": "SA",
+            "roomMapping": True,
+            "language": user_lang
+        }
+        (d_resp, d_error), (rates_resp, rates_error) = client.make_requests([
+            {'endpoint': '/data/hotel', 'method': 'GET', 'params': {
                 'hotelId': hotel_lite_id,
                 'language': user_lang 
-            })
+            }},
+            {'endpoint': '/hotels/rates', 'method': 'POST', 'json': rates_payload},
+        ])
+
+        # دمج البيانات الحية من API (Live Data Merge)
+        try:
+            if d_error:
+                raise d_error
             d_data = d_resp.get('data', {})
             
             if d_data:
@@ -96,18 +120,9 @@ class LiteAPIDetailsController(http.Controller):
         grouped_rooms = {}
         error_msg = ""
         try:
-            payload = {
-                "hotelIds": [hotel_lite_id],
-                "occupancies": [{"adults": int(search_params.get('guests', 2))}],
-                "checkin": search_params.get('checkin'),
-                "checkout": search_params.get('checkout'),
-                "currency": "SAR",
-                "guestNationality": "SA",
-                "roomMapping": True,
-                "language": user_lang
-            }
-            resp = client.make_request('/hotels/rates', method='POST', json=payload)
-            data = resp.get('data', [])
+            if rates_error:
+                raise rates_error
+            data = rates_resp.get('data', [])
             
             if data:
                 for room in data[0].get('roomTypes', []):
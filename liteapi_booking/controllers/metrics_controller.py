@@ -0,0 +1,79 @@
+import hmac
+
+from odoo import http
+from odoo.http import request
+
+from ..services.audit_queue import AUDIT_QUEUE
+from ..services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, breaker_stats
+from ..services.http_pool import POOL
+from ..services.metrics import render_metrics, render_stats
+from ..services.rate_limiter import RATE_LIMIT_STATS
+from ..services.retry_policy import RETRY_BUDGET
+from ..services.search_service import L1_CACHE, L2_STATS
+
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class LiteAPIMetricsController(http.Controller):
+
+    @http.route('/liteapi/metrics', type='http', auth='public', methods=['GET'], csrf=False)
+    def liteapi_metrics(self, **kwargs):
+        """
+        مقاييس هذا الـ Worker بصيغة Prometheus.
+        الوصول: مدير النظام، أو Authorization: Bearer <liteapi.metrics_token> لأداة الجمع.
+        """
+        if not self._is_authorized():
+            return request.make_response('Forbidden', headers=[('Content-Type', 'text/plain')], status=403)
+        body = render_metrics() + "\n".join(self._service_stats()) + "\n"
+        return request.make_response(body, headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')])
+
+    def _is_authorized(self):
+        token = request.env['ir.config_parameter'].sudo().get_param('liteapi.metrics_token')
+        auth_header = request.httprequest.headers.get('Authorization', '')
+        if token and hmac.compare_digest(auth_header.encode(), f"Bearer {token}".encode()):
+            return True
+        return bool(request.session.uid) and request.env.user.has_group('base.group_system')
+
+    def _service_stats(self):
+        """ عدادات الخدمات الموجودة أصلاً (الكاش، حدود الطلبات، القواطع، ...) وقت القراءة """
+        l1 = L1_CACHE.stats()
+        lines = render_stats('liteapi_search_cache_events_total', 'Search cache lookups per level.', 'counter', [
+            ({'level': 'l1', 'event': 'hit'}, l1['hits']),
+            ({'level': 'l1', 'event': 'miss'}, l1['misses']),
+            ({'level': 'l1', 'event': 'eviction'}, l1['evictions']),
+            ({'level': 'l2', 'event': 'hit'}, L2_STATS['hits']),
+            ({'level': 'l2', 'event': 'miss'}, L2_STATS['misses']),
+            ({'level': 'l2', 'event': 'stale'}, L2_STATS['stale']),
+        ])
+        lines += render_stats('liteapi_search_l1_bytes', 'Bytes held by the in-memory search cache.', 'gauge', [
+            ({}, l1['bytes']),
+        ])
+        lines += render_stats('liteapi_ratelimit_requests_total', 'Rate limiter decisions.', 'counter', [
+            ({'result': 'allowed'}, RATE_LIMIT_STATS['allowed']),
+            ({'result': 'rejected'}, RATE_LIMIT_STATS['rejected']),
+            ({'result': 'shared_error'}, RATE_LIMIT_STATS['shared_errors']),
+        ])
+        lines += render_stats('liteapi_ratelimit_rejections_total', 'Rate limit rejections per route and scope.', 'counter', [
+            (dict(zip(('route', 'scope'), key.split(':', 1))), count)
+            for key, count in sorted(RATE_LIMIT_STATS['rejected_by'].items())
+        ])
+        breakers = breaker_stats()
+        lines += render_stats('liteapi_circuit_state', 'Circuit breaker state (0 closed, 1 half-open, 2 open).', 'gauge', [
+            ({'endpoint': endpoint}, CIRCUIT_STATE_VALUES[stats['state']]) for endpoint, stats in sorted(breakers.items())
+        ])
+        lines += render_stats('liteapi_circuit_events_total', 'Circuit breaker outcomes.', 'counter', [
+            ({'endpoint': endpoint, 'event': event}, stats[event])
+            for endpoint, stats in sorted(breakers.items())
+            for event in ('success', 'failure', 'rejected', 'opened')
+        ])
+        lines += render_stats('liteapi_retries_total', 'Upstream retries and retries refused by the budget.', 'counter', [
+            ({'outcome': 'retried'}, RETRY_BUDGET.stats['retries']),
+            ({'outcome': 'budget_exhausted'}, RETRY_BUDGET.stats['exhausted']),
+        ])
+        lines += render_stats('liteapi_audit_queue_events_total', 'Async audit log queue counters.', 'counter', [
+            ({'event': event}, count) for event, count in sorted(AUDIT_QUEUE.stats.items())
+        ])
+        lines += render_stats('liteapi_http_connections_total', 'Upstream keep-alive pool events.', 'counter', [
+            ({'event': event}, count) for event, count in sorted(POOL.stats.items())
+        ])
+        return lines
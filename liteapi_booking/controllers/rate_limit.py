@@ -0,0 +1,21 @@
+from odoo.http import request
+
+
+def check_rate_limit(name):
+    """
+    فحص حدود المسار للجلسة والمستخدم وعنوان IP الحاليين.
+    يعيد None إن سُمح بالطلب، وإلا رد 429 مع Retry-After.
+    """
+    retry_after = request.env['liteapi.rate.limiter'].sudo().check(
+        name,
+        session_id=request.session.sid,
+        user_id=request.session.uid,
+        ip=request.httprequest.remote_addr,
+    )
+    if not retry_after:
+        return None
+    return request.make_response(
+        f"Too many requests, please try again in {retry_after} seconds.",
+        headers=[('Content-Type', 'text/plain; charset=utf-8'), ('Retry-After', str(retry_after))],
+        status=429,
+    )
@@ -2,8 +2,15 @@ from odoo import http
 from odoo.http import request
 import logging
 
+from .rate_limit import check_rate_limit
+from ..services.metrics import timed_route
+
 _logger = logging.getLogger(__name__)
 
+# أقصى عدد لإعادات تحميل صفحة النتائج الجزئية (كل 4 ثوانٍ) قبل التوقف، حتى لا تتكرر
+# بلا نهاية إذا فشل التحديث الخلفي (وكل إعادة تُحسب من حد /hotel/results)
+MAX_PARTIAL_RELOADS = 5
+
 class LiteAPISearchController(http.Controller):
 
     @http.route(['/hotel/search'], type='http', auth="public", website=True)
@@ -12,7 +19,13 @@ class LiteAPISearchController(http.Controller):
         return request.render("liteapi_booking.hotel_search_template", {'cities': cities})
 
     @http.route(['/hotel/results'], type='http', auth="public", website=True, methods=['POST', 'GET'], csrf=False)
+    @timed_route('/hotel/results')
     def hotel_search_results(self, **kwargs):
+        # حماية حصة الـ API وسعة الـ Workers من التكرار المفرط (Scraping)
+        limited = check_rate_limit('search')
+        if limited:
+            return limited
+
         session_search = request.session.get('liteapi_search', {})
         
         # استرجاع المعايير
@@ -31,12 +44,19 @@ class LiteAPISearchController(http.Controller):
             'guests': guests
         }
 
+        try:
+            reload_attempt = int(kwargs.get('reload') or 0)
+        except ValueError:
+            reload_attempt = 0
+
         hotels = []
+        partial = False
         if search_value and checkin and checkout:
             try:
                 service = request.env['liteapi.search.service'].sudo()
                 result = service.search_hotels(search_type, search_value, checkin, checkout, guests)
                 hotels = result.get('hotels', [])
+                partial = result.get('partial', False)
             except Exception as e:
                 _logger.error(f"Search Error: {e}")
 
@@ -61,10 +81,17 @@ class LiteAPISearchController(http.Controller):
         # الترتيب حسب السعر (اختياري لتحسين العرض)
         hotels = sorted(hotels, key=lambda x: x['price'])
 
+        # النتيجة الكاملة أو الخطأ يوقفان إعادة التحميل (partial=False)
+        reload_url = False
+        if partial and reload_attempt < MAX_PARTIAL_RELOADS:
+            reload_url = f"/hotel/results?reload={reload_attempt + 1}"
+
         return request.render("liteapi_booking.hotel_search_results_template", {
             'hotels': hotels,
             'guests': guests,
             'search_type': search_type,
             'search_params': request.session['liteapi_search'],
-            'selected_stars': selected_stars
+            'selected_stars': selected_stars,
+            'partial': partial,
+            'reload_url': reload_url,
         })
\ No newline at end of file
@@ -0,0 +1,74 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """
+    إزالة التكرار قبل إنشاء القيود الفريدة على liteapi_hotel_id و liteapi_booking_id.
+    """
+    if not version:
+        return
+    _dedupe_hotels(cr)
+    _dedupe_bookings(cr)
+
+
+def _dedupe_hotels(cr):
+    # نحتفظ بأقدم سجل لكل liteapi_hotel_id وننقل إليه كل المراجع
+    cr.execute("""
+        CREATE TEMP TABLE liteapi_hotel_dupes ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, min(id) OVER (PARTITION BY liteapi_hotel_id) AS keep_id
+            FROM liteapi_hotel
+            WHERE liteapi_hotel_id IS NOT NULL
+        ) ranked
+        WHERE id <> keep_id
+    """)
+    cr.execute("SELECT count(*) FROM liteapi_hotel_dupes")
+    count = cr.fetchone()[0]
+    if not count:
+        return
+
+    # الاحتفاظ بالصور والنجوم المخزنة في النسخ المكررة إن كانت ناقصة في السجل الأصلي
+    cr.execute("""
+        UPDATE liteapi_hotel AS keep SET
+            image_url = COALESCE(NULLIF(keep.image_url, ''), src.image_url),
+            star_rating = GREATEST(COALESCE(keep.star_rating, 0), src.star_rating)
+        FROM (
+            SELECT d.keep_id, max(h.image_url) AS image_url, max(COALESCE(h.star_rating, 0)) AS star_rating
+            FROM liteapi_hotel_dupes d JOIN liteapi_hotel h ON h.id = d.id
+            GROUP BY d.keep_id
+        ) src
+        WHERE keep.id = src.keep_id
+    """)
+    for table, column in [
+        ('liteapi_booking', 'hotel_id'),
+        ('liteapi_room_rate', 'hotel_id'),
+        ('sale_order_line', 'liteapi_hotel_id'),
+    ]:
+        cr.execute(f"""
+            UPDATE {table} AS t SET {column} = d.keep_id
+            FROM liteapi_hotel_dupes d
+            WHERE t.{column} = d.id
+        """)
+    cr.execute("""
+        DELETE FROM ir_model_data
+        WHERE model = 'liteapi.hotel' AND res_id IN (SELECT id FROM liteapi_hotel_dupes)
+    """)
+    cr.execute("DELETE FROM liteapi_hotel WHERE id IN (SELECT id FROM liteapi_hotel_dupes)")
+    _logger.info("LiteAPI migration: merged %s duplicate hotels", count)
+
+
+def _dedupe_bookings(cr):
+    # الحجوزات سجلات مالية فلا نحذفها؛ نميز النسخ المكررة بلاحقة ونُبقي الأقدم على المعرف الأصلي
+    cr.execute("""
+        UPDATE liteapi_booking AS b SET liteapi_booking_id = b.liteapi_booking_id || '-dup-' || b.id
+        FROM (
+            SELECT id, min(id) OVER (PARTITION BY liteapi_booking_id) AS keep_id
+            FROM liteapi_booking
+            WHERE liteapi_booking_id IS NOT NULL
+        ) ranked
+        WHERE b.id = ranked.id AND ranked.id <> ranked.keep_id
+    """)
+    if cr.rowcount:
+        _logger.info("LiteAPI migration: renamed %s duplicate booking references", cr.rowcount)
@@ -0,0 +1,13 @@
+def migrate(cr, version):
+    """
+    أصبح details حقلاً محسوباً يفك ضغط details_z؛ نحتفظ بالنصوص القديمة في details_legacy
+    حتى تبقى السجلات السابقة قابلة للعرض.
+    """
+    if not version:
+        return
+    cr.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'liteapi_audit_log' AND column_name = 'details'
+    """)
+    if cr.fetchone():
+        cr.execute("ALTER TABLE liteapi_audit_log RENAME COLUMN details TO details_legacy")
@@ -1,3 +1,4 @@
+from . import gc_mixin
 from . import country
 from . import city
 from . import hotel
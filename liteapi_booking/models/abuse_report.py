@@ -1,5 +1,79 @@
+import logging
+import time
 from odoo import models, fields, api, tools
 
+_logger = logging.getLogger(__name__)
+
+
+class LiteAPIUsageDaily(models.Model):
+    """
+    عدادات يومية لكل مستخدم (بحث / حجز)، تُحدَّث تدريجياً من الـ Cron.
+    تبقى بعد حذف سجلات التدقيق القديمة (GC)، وتقرير المخاطر يُقرأ منها فقط.
+    """
+    _name = 'liteapi.usage.daily'
+    _description = 'LiteAPI Daily Usage Counters'
+    _order = 'day desc'
+
+    user_id = fields.Many2one('res.users', string='User', readonly=True, index=True)
+    day = fields.Date(string='Day', readonly=True, required=True)
+    search_count = fields.Integer(string='Searches', readonly=True)
+    booking_count = fields.Integer(string='Bookings', readonly=True)
+
+    _sql_constraints = [
+        ('user_day_unique', 'unique(user_id, day)', 'One usage row per user and day!')
+    ]
+
+    def init(self):
+        # فهرس تاريخ الإنشاء للحجوزات، حتى يقرأ التحديث التدريجي الأيام الأخيرة فقط
+        self.env.cr.execute(
+            "CREATE INDEX IF NOT EXISTS liteapi_booking_create_date_idx ON liteapi_booking (create_date)"
+        )
+
+    @api.model
+    def _cron_refresh_usage(self):
+        """
+        إعادة حساب عدادات الأيام من آخر يوم محسوب (شاملاً له لأنه قد يكون ناقصاً) حتى اليوم.
+        كل مصدر يُجمَّع على حدة (GROUP BY مستخدم ويوم) ثم يُدمج بـ ON CONFLICT،
+        فلا يوجد ضرب بين سجلات البحث والحجوزات كما في العرض القديم.
+        """
+        started = time.monotonic()
+        cr = self.env.cr
+        cr.execute("SELECT max(day) FROM liteapi_usage_daily")
+        last_day = cr.fetchone()[0]
+        # أول تشغيل: من أقدم سجل موجود
+        since = fields.Datetime.to_datetime(last_day) if last_day else fields.Datetime.to_datetime('1970-01-01')
+
+        cr.execute("""
+            INSERT INTO liteapi_usage_daily AS u
+                (user_id, day, search_count, booking_count, create_uid, create_date, write_uid, write_date)
+            SELECT user_id, day, sum(searches), sum(bookings),
+                   %(uid)s, (now() at time zone 'UTC'), %(uid)s, (now() at time zone 'UTC')
+            FROM (
+                SELECT l.user_id, l.create_date::date AS day, count(*) AS searches, 0 AS bookings
+                FROM liteapi_audit_log l
+                WHERE l.create_date >= %(since)s AND l.name LIKE 'Search%%' AND l.user_id IS NOT NULL
+                GROUP BY 1, 2
+                UNION ALL
+                SELECT so.user_id, b.create_date::date AS day, 0 AS searches, count(*) AS bookings
+                FROM liteapi_booking b
+                JOIN sale_order so ON so.id = b.sale_order_id
+                WHERE b.create_date >= %(since)s AND so.user_id IS NOT NULL
+                GROUP BY 1, 2
+            ) counts
+            GROUP BY user_id, day
+            ON CONFLICT (user_id, day) DO UPDATE SET
+                -- سجلات البحث التي حذفها الـ GC لا تُنقص العداد المحسوب سابقاً
+                search_count = GREATEST(u.search_count, EXCLUDED.search_count),
+                booking_count = EXCLUDED.booking_count,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+        """, {'since': since, 'uid': self.env.uid})
+        refreshed = cr.rowcount
+        self.invalidate_model()
+        _logger.info(f"📊 Usage counters refreshed: {refreshed} user-days since {since.date()} in {time.monotonic() - started:.2f}s")
+        return refreshed
+
+
 class LiteAPIAbuseReport(models.Model):
     _name = "liteapi.abuse.report"
     _description = "Abuse Analysis Report"
@@ -12,26 +86,25 @@ class LiteAPIAbuseReport(models.Model):
     risk_level = fields.Selection([('low', 'Low'), ('high', 'High Risk')], string='Risk', readonly=True)
 
     def init(self):
+        # العرض مبني على جدول العدادات اليومية (صف لكل مستخدم ويوم) وليس على السجلات الخام
         tools.drop_view_if_exists(self.env.cr, self._table)
         self.env.cr.execute("""
             CREATE OR REPLACE VIEW %s AS (
-                SELECT 
-                    row_number() OVER () as id,
-                    u.id as user_id,
-                    count(l.id) as search_count,
-                    count(b.id) as booking_count,
-                    CASE 
-                        WHEN count(l.id) = 0 THEN 0 
-                        ELSE CAST(count(b.id) AS FLOAT) / CAST(count(l.id) AS FLOAT) 
+                SELECT
+                    d.user_id as id,
+                    d.user_id as user_id,
+                    sum(d.search_count) as search_count,
+                    sum(d.booking_count) as booking_count,
+                    CASE
+                        WHEN sum(d.search_count) = 0 THEN 0
+                        ELSE CAST(sum(d.booking_count) AS FLOAT) / CAST(sum(d.search_count) AS FLOAT)
                     END as ratio,
-                    CASE 
-                        WHEN count(l.id) > 20 AND count(b.id) = 0 THEN 'high'
+                    CASE
+                        WHEN sum(d.search_count) > 20 AND sum(d.booking_count) = 0 THEN 'high'
                         ELSE 'low'
                     END as risk_level
-                FROM res_users u
-                LEFT JOIN liteapi_audit_log l ON l.user_id = u.id AND l.name LIKE 'Search%%'
-                LEFT JOIN liteapi_booking b ON b.sale_order_id IN (SELECT id FROM sale_order WHERE user_id = u.id)
-                GROUP BY u.id
-                HAVING count(l.id) > 0
+                FROM liteapi_usage_daily d
+                GROUP BY d.user_id
+                HAVING sum(d.search_count) > 0
             )
         """ % (self._table,))
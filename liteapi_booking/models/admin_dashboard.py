@@ -1,5 +1,11 @@
+import time
+from datetime import datetime, time as dt_time
 from odoo import models, fields, api
 
+# نتائج المؤشرات مخزنة لكل قاعدة بيانات لفترة قصيرة، حتى لا يعيد كل فتح للوحة حسابها
+DEFAULT_KPI_CACHE_SECONDS = 60
+_KPI_CACHE = {}
+
 class LiteAPIAdminDashboard(models.TransientModel):
     _name = 'liteapi.admin.dashboard'
     _description = 'LiteAPI Admin Dashboard'
@@ -15,35 +21,54 @@ class LiteAPIAdminDashboard(models.TransientModel):
 
     @api.depends('name')
     def _compute_kpis(self):
+        kpis = self._get_kpis()
         for rec in self:
-            today = fields.Date.today()
-            # Searches (Count of cache checks or api calls in search service?)
-            # Approximation via Log
-            rec.today_searches = self.env['liteapi.audit.log'].search_count([
-                ('create_date', '>=', today), 
-                ('name', 'ilike', 'Search:')
-            ])
-            
-            # Bookings
-            rec.today_bookings = self.env['liteapi.booking'].search_count([
-                ('create_date', '>=', today), 
-                ('status', '=', 'confirmed')
-            ])
-
-            # Errors
-            rec.today_errors = self.env['liteapi.audit.log'].search_count([
-                ('create_date', '>=', today), 
-                ('result', 'in', ['blocked', 'error'])
-            ])
-
-            # Wallet Liability (Total Balances)
-            rec.wallet_liability = sum(self.env['customer.wallet'].search([]).mapped('balance'))
-
-            # Cache Hit Ratio (Last 24h)
-            logs = self.env['liteapi.audit.log'].search([
-                ('create_date', '>=', today), 
-                ('name', 'ilike', 'Search:')
-            ])
-            hits = len(logs.filtered(lambda l: 'Cache Hit' in (l.details or '')))
-            total = len(logs)
-            rec.cache_hit_ratio = (hits / total * 100) if total > 0 else 0.0
+            rec.update(kpis)
+
+    @api.model
+    def _get_kpis(self):
+        dbname = self.env.cr.dbname
+        cached = _KPI_CACHE.get(dbname)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        ttl = int(self.env['ir.config_parameter'].sudo().get_param(
+            'liteapi.dashboard_cache_seconds', DEFAULT_KPI_CACHE_SECONDS))
+        kpis = self._query_kpis()
+        _KPI_CACHE[dbname] = (time.monotonic() + ttl, kpis)
+        return kpis
+
+    @api.model
+    def _query_kpis(self):
+        """ كل المؤشرات باستعلامات تجميع SQL على أعمدة مفهرسة، بدون تحميل السجلات أو نصوصها """
+        cr = self.env.cr
+        today_start = datetime.combine(fields.Date.today(), dt_time.min)
+
+        # Searches / Cache Hits / Errors (سجل التدقيق، فهرس create_date)
+        cr.execute("""
+            SELECT count(*) FILTER (WHERE name LIKE 'Search:%%'),
+                   count(*) FILTER (WHERE name LIKE 'Search:%%' AND cache_hit),
+                   count(*) FILTER (WHERE result IN ('blocked', 'error'))
+            FROM liteapi_audit_log
+            WHERE create_date >= %s
+        """, (today_start,))
+        searches, hits, errors = cr.fetchone()
+
+        # Bookings
+        cr.execute("""
+            SELECT count(*) FROM liteapi_booking
+            WHERE create_date >= %s AND status = 'confirmed'
+        """, (today_start,))
+        bookings = cr.fetchone()[0]
+
+        # Wallet Liability (Total Balances) - balance حقل مخزن
+        cr.execute("SELECT COALESCE(sum(balance), 0) FROM customer_wallet")
+        liability = cr.fetchone()[0]
+
+        return {
+            'today_searches': searches,
+            'today_bookings': bookings,
+            'today_errors': errors,
+            'wallet_liability': float(liability),
+            'cache_hit_ratio': (hits / searches * 100) if searches else 0.0,
+        }
@@ -1,8 +1,11 @@
 from odoo import models, fields, api
 from datetime import timedelta # <--- يجب إضافة هذا السطر
 
+from ..services.audit_queue import decompress_details
+
 class LiteAPIAudit(models.Model):
     _name = 'liteapi.audit.log'
+    _inherit = ['liteapi.gc.mixin']
     _description = 'LiteAPI Audit Log'
     _order = 'create_date desc'
 
@@ -14,11 +17,44 @@ class LiteAPIAudit(models.Model):
         ('blocked', 'Blocked'),
         ('error', 'Error')
     ], string='Result', required=True)
-    details = fields.Text(string='Details')
+    # التفاصيل مخزنة مضغوطة في عمود bytea (details_z) خارج الـ ORM، وتُفك فقط عند العرض
+    details = fields.Text(string='Details', compute='_compute_details')
+    details_size = fields.Integer(string='Details Size (bytes)', readonly=True)
+    cache_hit = fields.Boolean(string='Cache Hit', readonly=True)
+
+    def init(self):
+        # details_legacy: عمود details النصي القديم (قبل الضغط) بعد إعادة تسميته في الترحيل
+        self.env.cr.execute("""
+            ALTER TABLE liteapi_audit_log
+                ADD COLUMN IF NOT EXISTS details_z bytea,
+                ADD COLUMN IF NOT EXISTS details_legacy text
+        """)
+        # فهرس لحذف السجلات القديمة (GC) وللوحة التحكم حسب التاريخ
+        self.env.cr.execute(
+            "CREATE INDEX IF NOT EXISTS liteapi_audit_log_create_date_idx ON liteapi_audit_log (create_date)"
+        )
+        # فهرس جزئي لأحداث البحث فقط (عداد البحث ونسبة الكاش في لوحة التحكم)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS liteapi_audit_log_search_idx ON liteapi_audit_log (create_date, cache_hit)
+            WHERE name LIKE 'Search:%%'
+        """)
+
+    def _compute_details(self):
+        records = self.filtered('id')
+        rows = {}
+        if records:
+            self.env.cr.execute(
+                "SELECT id, details_z, details_legacy FROM liteapi_audit_log WHERE id IN %s",
+                (tuple(records.ids),)
+            )
+            rows = {row[0]: row[1:] for row in self.env.cr.fetchall()}
+        for rec in self:
+            blob, legacy = rows.get(rec.id, (None, None))
+            rec.details = decompress_details(blob) if blob else (legacy or '')
 
     @api.model
     def _gc_old_logs(self):
         """Delete logs older than 30 days"""
         # التصحيح هنا: استخدام timedelta مباشرة
         limit_date = fields.Datetime.now() - timedelta(days=30)
-        self.search([('create_date', '<', limit_date)]).unlink()
\ No newline at end of file
+        return self._gc_delete_chunked("create_date < %s", [limit_date])
\ No newline at end of file
@@ -15,7 +15,7 @@ class LiteAPIBooking(models.Model):
 
     # تفاصيل الحجز
     liteapi_booking_id = fields.Char(string='LiteAPI Booking ID', help="Booking ID from LiteAPI system")
-    prebook_id = fields.Char(string='Prebook ID')
+    prebook_id = fields.Char(string='Prebook ID', index=True)
     transaction_id = fields.Char(string='Transaction ID')
     
     hotel_name = fields.Char(string='Hotel Name')
@@ -45,6 +45,11 @@ class LiteAPIBooking(models.Model):
     cancellation_deadline = fields.Datetime(string="Cancellation Deadline")
     cancellation_policy = fields.Text(string="Cancellation Policy")
 
+    # القيد الفريد ينشئ فهرس btree على liteapi_booking_id (القيم الفارغة NULL مسموحة ومتعددة)
+    _sql_constraints = [
+        ('liteapi_booking_id_unique', 'unique(liteapi_booking_id)', 'LiteAPI Booking ID must be unique!')
+    ]
+
     @api.model
     def create(self, vals):
         if vals.get('name', 'New') == 'New':
@@ -1,4 +1,5 @@
-from odoo import models, fields
+from odoo import models, fields, _
+from odoo.exceptions import UserError
 
 class LiteAPICity(models.Model):
     _name = 'liteapi.city'
@@ -8,3 +9,21 @@ class LiteAPICity(models.Model):
     liteapi_city_id = fields.Char(string='LiteAPI City ID', required=True)
     country_id = fields.Many2one('liteapi.country', string='Country', required=True)
     is_active = fields.Boolean(string='Active', default=False)
+
+    # حالة مزامنة كتالوج الفنادق (/data/hotels)
+    catalog_sync_offset = fields.Integer(string='Catalog Sync Offset', default=0, readonly=True, copy=False)
+    catalog_synced_at = fields.Datetime(string='Catalog Synced At', readonly=True, copy=False)
+
+    def action_sync_catalog(self):
+        """
+        وضع المدن في طابور مزامنة الكتالوج وتشغيل الـ Cron فوراً، بدلاً من مزامنة كاملة
+        (صفحات كثيرة مع commit لكل صفحة) داخل طلب HTTP. الـ Cron يزامن المدن المفعلة فقط.
+        """
+        inactive = self.filtered(lambda city: not city.is_active)
+        if inactive:
+            raise UserError(_("Activate the city before syncing its hotels: %s") % ", ".join(inactive.mapped('name')))
+        self.write({'catalog_synced_at': False})
+        cron = self.env.ref('liteapi_booking.ir_cron_sync_hotel_catalog', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return True
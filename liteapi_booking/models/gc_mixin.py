@@ -0,0 +1,43 @@
+import logging
+import time
+from odoo import models, api
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_GC_CHUNK_SIZE = 5000
+DEFAULT_GC_TIME_BUDGET = 120  # ثواني لكل تشغيل للـ Cron
+
+
+class LiteAPIGCMixin(models.AbstractModel):
+    _name = 'liteapi.gc.mixin'
+    _description = 'LiteAPI Chunked Garbage Collection'
+
+    @api.model
+    def _gc_delete_chunked(self, where_clause, params):
+        """
+        حذف السجلات القديمة على دفعات بـ SQL مباشر بدلاً من search().unlink() دفعة واحدة:
+        لا يُحمَّل شيء في الذاكرة، وكل دفعة تُثبَّت فوراً فلا تطول الأقفال،
+        ويتوقف الحذف عند انتهاء الوقت المخصص ليكمله التشغيل التالي.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        chunk_size = int(ICP.get_param('liteapi.gc_chunk_size', DEFAULT_GC_CHUNK_SIZE))
+        time_budget = int(ICP.get_param('liteapi.gc_time_budget', DEFAULT_GC_TIME_BUDGET))
+
+        started = time.monotonic()
+        total = 0
+        while time.monotonic() - started < time_budget:
+            self.env.cr.execute(f"""
+                DELETE FROM {self._table} WHERE id IN (
+                    SELECT id FROM {self._table} WHERE {where_clause} LIMIT %s
+                )
+            """, list(params) + [chunk_size])
+            deleted = self.env.cr.rowcount
+            total += deleted
+            self.env.cr.commit()
+            if deleted < chunk_size:
+                break
+
+        self.invalidate_model()
+        elapsed = max(time.monotonic() - started, 0.001)
+        _logger.info(f"🧹 GC {self._table}: deleted {total} rows in {elapsed:.1f}s = {total / elapsed:.0f} rows/sec")
+        return total
@@ -20,4 +20,9 @@ class LiteAPIHotel(models.Model):
     # تعني أن Odoo سيحفظ قيمة مستقلة لكل لغة (AR, EN)
     description = fields.Html(string='Cached Description', translate=True)
     
-    amenities = fields.Text(string='Cached Amenities')
\ No newline at end of file
+    amenities = fields.Text(string='Cached Amenities')
+
+    # القيد الفريد ينشئ فهرس btree على liteapi_hotel_id (لا حاجة لـ index=True إضافي)
+    _sql_constraints = [
+        ('liteapi_hotel_id_unique', 'unique(liteapi_hotel_id)', 'LiteAPI Hotel ID must be unique!')
+    ]
\ No newline at end of file
@@ -2,6 +2,7 @@ from odoo import models, fields, api
 
 class LiteAPIRoomRate(models.Model):
     _name = 'liteapi.room.rate'
+    _inherit = ['liteapi.gc.mixin']
     _description = 'LiteAPI Room Rate (Temporary)'
     _order = 'create_date desc'
 
@@ -11,9 +12,9 @@ class LiteAPIRoomRate(models.Model):
     price = fields.Float(required=True)
     currency = fields.Char(required=True, default='SAR')
     is_refundable = fields.Boolean(default=False)
-    expires_at = fields.Datetime(required=True)
+    expires_at = fields.Datetime(required=True, index=True)
 
     @api.model
     def _clean_expired_rates(self):
         """Cron job to delete expired rate entries"""
-        self.search([('expires_at', '<', fields.Datetime.now())]).unlink()
+        return self._gc_delete_chunked("expires_at < %s", [fields.Datetime.now()])
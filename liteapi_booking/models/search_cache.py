@@ -1,7 +1,9 @@
+from datetime import timedelta
 from odoo import models, fields, api
 
 class LiteAPISearchCache(models.Model):
     _name = 'liteapi.search.cache'
+    _inherit = ['liteapi.gc.mixin']
     _description = 'LiteAPI Search Cache'
     _order = 'create_date desc'
 
@@ -12,13 +14,39 @@ class LiteAPISearchCache(models.Model):
     checkout_date = fields.Date(required=True)
     guests = fields.Integer(required=True)
     response_json = fields.Text(required=True)
-    expires_at = fields.Datetime(required=True)
+    expires_at = fields.Datetime(required=True, index=True)
 
     _sql_constraints = [
         ('cache_key_unique', 'unique(cache_key)', 'Cache key must be unique!')
     ]
 
+    @api.model
+    def _upsert(self, vals):
+        """
+        حفظ ذري للكاش: INSERT ... ON CONFLICT (cache_key) DO UPDATE.
+        create() كان يفشل بـ IntegrityError عند تحديث مفتاح موجود بعد انتهاء صلاحيته.
+        """
+        self.env.cr.execute("""
+            INSERT INTO liteapi_search_cache
+                (cache_key, city_id, checkin_date, checkout_date, guests, response_json, expires_at,
+                 create_uid, create_date, write_uid, write_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, (now() at time zone 'UTC'), %s, (now() at time zone 'UTC'))
+            ON CONFLICT (cache_key) DO UPDATE SET
+                city_id = EXCLUDED.city_id,
+                response_json = EXCLUDED.response_json,
+                expires_at = EXCLUDED.expires_at,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+        """, (
+            vals['cache_key'], vals.get('city_id') or None, vals['checkin_date'], vals['checkout_date'],
+            vals['guests'], vals['response_json'], vals['expires_at'], self.env.uid, self.env.uid,
+        ))
+        self.invalidate_model(['city_id', 'response_json', 'expires_at'])
+
     @api.model
     def _clean_expired_cache(self):
         """Cron job to delete expired cache entries"""
-        self.search([('expires_at', '<', fields.Datetime.now())]).unlink()
\ No newline at end of file
+        # نحتفظ بالسجلات المنتهية لفترة، لأنها مصدر الـ Stale Fallback عند تعطل الـ API
+        retention = int(self.env['ir.config_parameter'].sudo().get_param('liteapi.search_cache_retention_hours', 24))
+        limit_date = fields.Datetime.now() - timedelta(hours=retention)
+        return self._gc_delete_chunked("expires_at < %s", [limit_date])
\ No newline at end of file
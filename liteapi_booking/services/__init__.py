@@ -2,5 +2,7 @@ from . import liteapi_client
 from . import search_service
 from . import booking_service
 from . import wallet_service
+from . import catalog_service
+from . import rate_limiter
 
 
@@ -0,0 +1,165 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+
+import psycopg2
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_logger = logging.getLogger(__name__)
+
+QUEUE_MAXSIZE = 10000
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 2.0  # ثواني
+ERROR_PUT_TIMEOUT = 0.05  # انتظار قصير لسجلات الأخطاء قبل إسقاطها
+
+AUDIT_COLUMNS = ('name', 'timestamp', 'user_id', 'result', 'cache_hit')
+
+# أول بايت في details_z يحدد خوارزمية الضغط
+CODEC_ZLIB = b'z'
+CODEC_ZSTD = b's'
+TRUNCATED_MARKER = "\n\n... [truncated: {} bytes total]"
+
+
+class AuditQueue:
+    """
+    طابور سجلات التدقيق داخل الـ Worker، يُفرَّغ على دفعات (INSERT متعدد الصفوف)
+    من خيط خلفي وبـ cursor مستقل، حتى لا يدفع الطلب تكلفة الكتابة في قاعدة البيانات.
+
+    سياسة الضغط: عند امتلاء الطابور تُسقط سجلات النجاح فوراً، وسجلات الأخطاء
+    تنتظر فترة قصيرة (ERROR_PUT_TIMEOUT) قبل إسقاطها. كل ذلك يُعد في stats.
+    """
+
+    def __init__(self, maxsize=QUEUE_MAXSIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._pid = os.getpid()
+        self.stats = {'enqueued': 0, 'dropped': 0, 'flushed': 0, 'failed': 0}
+
+    def put(self, dbname, vals):
+        self._ensure_worker()
+        record = (dbname, vals)
+        try:
+            if vals.get('result') == 'success':
+                self._queue.put_nowait(record)
+            else:
+                self._queue.put(record, timeout=ERROR_PUT_TIMEOUT)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        self.stats['enqueued'] += 1
+        return True
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # بعد fork: الطابور والخيط الموروثان لا يخصان هذه العملية
+                self._queue = queue.Queue(self.maxsize)
+                self._pid = os.getpid()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='liteapi-audit', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def flush_now(self):
+        """ تفريغ متزامن لما في الطابور (عند إيقاف العملية أو في السكربتات) """
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch):
+        from odoo.modules.registry import Registry
+
+        by_db = {}
+        for dbname, vals in batch:
+            by_db.setdefault(dbname, []).append(vals)
+
+        for dbname, records in by_db.items():
+            threading.current_thread().dbname = dbname
+            try:
+                with Registry(dbname).cursor() as cr:
+                    insert_audit_rows(cr, records)
+                self.stats['flushed'] += len(records)
+            except Exception:
+                self.stats['failed'] += len(records)
+                _logger.exception(f"Failed to flush {len(records)} audit log records")
+
+
+def compress_details(text, max_bytes=0):
+    """
+    ضغط نص السجل (zstd إن كانت المكتبة متوفرة وإلا zlib) مع حد أقصى اختياري للحجم.
+    يعيد (blob, الحجم الأصلي بالبايت).
+    """
+    raw = (text or '').encode('utf-8')
+    size = len(raw)
+    if max_bytes and size > max_bytes:
+        raw = raw[:max_bytes] + TRUNCATED_MARKER.format(size).encode('utf-8')
+    if zstandard is not None:
+        return CODEC_ZSTD + zstandard.ZstdCompressor(level=3).compress(raw), size
+    return CODEC_ZLIB + zlib.compress(raw, 6), size
+
+
+def decompress_details(blob):
+    if not blob:
+        return ''
+    blob = bytes(blob)
+    codec, payload = blob[:1], blob[1:]
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            return '[zstd-compressed details: install the zstandard package to view]'
+        raw = zstandard.ZstdDecompressor().decompress(payload)
+    else:
+        raw = zlib.decompress(payload)
+    return raw.decode('utf-8', errors='replace')
+
+
+def insert_audit_rows(cr, records):
+    """
+    INSERT واحد متعدد الصفوف في liteapi_audit_log.
+    التفاصيل تُضغط هنا (في خيط التفريغ) وليس في مسار الطلب.
+    """
+    row_sql = "(%s, %s, %s, %s, %s, %s, %s, %s, (now() at time zone 'UTC'), %s, (now() at time zone 'UTC'))"
+    params = []
+    for vals in records:
+        blob, size = compress_details(vals.get('details'), vals.get('max_bytes') or 0)
+        params.extend([vals.get(column) for column in AUDIT_COLUMNS])
+        params.extend([psycopg2.Binary(blob), size, vals.get('user_id'), vals.get('user_id')])
+    cr.execute(f"""
+        INSERT INTO liteapi_audit_log
+            (name, timestamp, user_id, result, cache_hit, details_z, details_size, create_uid, create_date, write_uid, write_date)
+        VALUES {", ".join([row_sql] * len(records))}
+    """, params)
+
+
+AUDIT_QUEUE = AuditQueue()
+atexit.register(AUDIT_QUEUE.flush_now)
@@ -1,11 +1,13 @@
-import json
 import logging
-from odoo import models, api, _, fields
+from odoo import models, api, _
 from odoo.exceptions import UserError
 
+from . import json_codec
+from .exceptions import LiteAPIError, OfferExpired
+
 _logger = logging.getLogger(__name__)
 
-# رابط خدمات الحجز
+# رابط خدمات الحجز (الافتراضي؛ يمكن تغييره عبر liteapi.booking_base_url، مثلاً لخادم المحاكاة في benchmarks/)
 BOOKING_BASE_URL = "https://book.liteapi.travel/v3.0"
 
 class BookingService(models.AbstractModel):
@@ -21,6 +23,7 @@ class BookingService(models.AbstractModel):
             raise UserError(_("Offer ID is missing."))
 
         client = self.env['liteapi.client']
+        booking_base_url = self._get_booking_base_url()
         clean_offer_id = str(offer_id).strip()
         
         payload = {
@@ -35,24 +38,23 @@ class BookingService(models.AbstractModel):
         }
 
         try:
-            _logger.info(f"⚡ PREBOOK REQUEST (Attempt 1): {json.dumps(payload)}")
+            _logger.info(f"⚡ PREBOOK REQUEST (Attempt 1): {json_codec.dumps(payload)}")
             
             response = client.make_request(
                 '/rates/prebook', 
                 method='POST', 
                 json=payload, 
                 params=query_params,
-                custom_base_url=BOOKING_BASE_URL
+                custom_base_url=booking_base_url
             )
             return self._parse_prebook_response(response)
 
-        except Exception as e:
-            error_msg = str(e)
-            _logger.warning(f"⚠️ Prebook Failed: {error_msg}")
+        except OfferExpired as e:
+            _logger.warning(f"⚠️ Prebook Failed: offer expired (status={e.status}, code={e.code})")
             
             # --- Smart Retry Logic ---
-            # التحقق من أخطاء انتهاء الصلاحية (4002 أو 400 بشكل عام)
-            if search_context and ('4002' in error_msg or 'invalid offerId' in error_msg.lower() or '400' in error_msg):
+            # العرض انتهت صلاحيته (مصنف في liteapi.client من كود الخطأ وليس من نص الرسالة)
+            if search_context:
                 _logger.info("🔄 Offer expired. Fetching FRESH offer via Refresh...")
                 
                 # جلب عرض جديد (هنا يحدث الخطأ سابقاً)
@@ -65,13 +67,13 @@ class BookingService(models.AbstractModel):
                     payload['offerId'] = new_id
                     
                     try:
-                        _logger.info(f"⚡ PREBOOK REQUEST (Retry): {json.dumps(payload)}")
+                        _logger.info(f"⚡ PREBOOK REQUEST (Retry): {json_codec.dumps(payload)}")
                         response = client.make_request(
                             '/rates/prebook', 
                             method='POST', 
                             json=payload, 
                             params=query_params,
-                            custom_base_url=BOOKING_BASE_URL
+                            custom_base_url=booking_base_url
                         )
                         result = self._parse_prebook_response(response)
                         
@@ -85,10 +87,18 @@ class BookingService(models.AbstractModel):
                     except Exception as retry_e:
                         _logger.error(f"❌ Retry Failed: {retry_e}")
             
-            if '4002' in error_msg or 'invalid offerId' in error_msg:
-                raise UserError(_("عذراً، انتهت صلاحية هذا العرض. يرجى إعادة البحث للحصول على أحدث الأسعار."))
-            
-            raise UserError(_("Booking Error: %s") % error_msg)
+            raise e.with_message(_("عذراً، انتهت صلاحية هذا العرض. يرجى إعادة البحث للحصول على أحدث الأسعار.")) from e
+
+        except LiteAPIError as e:
+            _logger.warning(f"⚠️ Prebook Failed: {e}")
+            raise e.with_message(_("Booking Error: %s") % e) from e
+        except Exception as e:
+            _logger.warning(f"⚠️ Prebook Failed: {e}")
+            raise UserError(_("Booking Error: %s") % e)
+
+    @api.model
+    def _get_booking_base_url(self):
+        return self.env['ir.config_parameter'].sudo().get_param('liteapi.booking_base_url') or BOOKING_BASE_URL
 
     def _parse_prebook_response(self, data):
         resp_data = data.get('data', {}) if isinstance(data, dict) else data
@@ -183,7 +193,20 @@ class BookingService(models.AbstractModel):
 
     @api.model
     def finalize_booking_api(self, prebook_id, transaction_id, guest_info, booking_meta={}):
-        """ تثبيت الحجز (Book) """
+        """
+        تثبيت الحجز (Book) مرة واحدة فقط لكل prebook_id:
+        - قفل (advisory xact lock) على prebook_id حتى نهاية المعاملة، فالطلب المكرر المتزامن
+          (ضغطتان، إعادة تحميل الصفحة) ينتظر الأول؛
+        - ثم فحص الحجز المحفوظ بـ cursor جديد (يرى ما ثبّته الطلب الأول) وإرجاعه بدل الحجز مجدداً؛
+        - clientReference ثابت مشتق من prebook_id ليتعرف الـ API على التكرار أيضاً.
+        طلب /rates/book نفسه لا يُعاد تلقائياً أبداً في liteapi.client.
+        """
+        self.env.cr.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"liteapi.book:{prebook_id}",))
+        existing = self._get_existing_booking(prebook_id)
+        if existing is not None:
+            _logger.warning(f"♻️ Prebook {prebook_id} already booked, returning existing booking {existing.get('bookingId')}")
+            return existing
+
         client = self.env['liteapi.client']
         
         first_name = guest_info.get('first_name', 'Guest')
@@ -207,17 +230,17 @@ class BookingService(models.AbstractModel):
                 "lastName": last_name,
                 "email": email
             }],
-            "clientReference": f"REF-{fields.Datetime.now().strftime('%Y%m%d%H%M')}"
+            "clientReference": self._client_reference(prebook_id)
         }
 
         try:
-            _logger.info(f"🚀 BOOK REQUEST: {json.dumps(payload)}")
+            _logger.info(f"🚀 BOOK REQUEST: {json_codec.dumps(payload)}")
             
             response = client.make_request(
                 '/rates/book', 
                 method='POST', 
                 json=payload,
-                custom_base_url=BOOKING_BASE_URL
+                custom_base_url=self._get_booking_base_url()
             )
             data = response.get('data', {}) if isinstance(response, dict) else response
             
@@ -227,9 +250,34 @@ class BookingService(models.AbstractModel):
             self._create_odoo_booking(data, guest_info, booking_meta, prebook_id, transaction_id)
             return data
 
+        except LiteAPIError as e:
+            raise e.with_message(f"Finalize Booking Error: {e}") from e
         except Exception as e:
             raise UserError(f"Finalize Booking Error: {str(e)}")
 
+    @api.model
+    def _client_reference(self, prebook_id):
+        return f"ODOO-{prebook_id}"
+
+    @api.model
+    def _get_existing_booking(self, prebook_id):
+        """ بيانات حجز مؤكد سابق لنفس prebook_id، بقراءة خارج snapshot المعاملة الحالية """
+        with self.env.registry.cursor() as cr:
+            cr.execute("""
+                SELECT liteapi_booking_id, booking_details FROM liteapi_booking
+                WHERE prebook_id = %s AND liteapi_booking_id IS NOT NULL
+                ORDER BY id LIMIT 1
+            """, (prebook_id,))
+            row = cr.fetchone()
+        if not row:
+            return None
+        try:
+            data = json_codec.loads(row[1] or '{}')
+        except ValueError:
+            data = {}
+        data.setdefault('bookingId', row[0])
+        return data
+
     def _create_odoo_booking(self, data, guest_info, booking_meta, prebook_id, transaction_id):
         email = guest_info.get('email')
         Partner = self.env['res.partner'].sudo()
@@ -253,5 +301,5 @@ class BookingService(models.AbstractModel):
             'checkout_date': booking_meta.get('checkout'),
             'guest_name': partner.name,
             'email': email,
-            'booking_details': json.dumps(data)
+            'booking_details': json_codec.dumps(data)
         })
\ No newline at end of file
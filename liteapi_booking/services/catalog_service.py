@@ -0,0 +1,161 @@
+import logging
+import time
+from datetime import timedelta
+from odoo import models, api, fields
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_TIME_BUDGET = 300  # ثواني لكل تشغيل للـ Cron
+DEFAULT_RESYNC_DAYS = 7
+
+
+class CatalogService(models.AbstractModel):
+    _name = 'liteapi.catalog.service'
+    _description = 'LiteAPI Hotel Catalog Sync'
+
+    @api.model
+    def _get_sync_config(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return {
+            'page_size': int(ICP.get_param('liteapi.catalog_page_size', DEFAULT_PAGE_SIZE)),
+            'time_budget': int(ICP.get_param('liteapi.catalog_time_budget', DEFAULT_TIME_BUDGET)),
+            'resync_days': int(ICP.get_param('liteapi.catalog_resync_days', DEFAULT_RESYNC_DAYS)),
+        }
+
+    @api.model
+    def _cron_sync_catalog(self):
+        """
+        مزامنة كتالوج الفنادق للمدن المفعلة من /data/hotels.
+        قابلة للاستئناف: الإزاحة (offset) تُحفظ بعد كل صفحة، والتشغيل التالي يكمل من حيث توقف.
+        تدريجية: المدن التي اكتملت مزامنتها خلال resync_days تُتخطى.
+        """
+        config = self._get_sync_config()
+        deadline = time.monotonic() + config['time_budget']
+        resync_before = fields.Datetime.now() - timedelta(days=config['resync_days'])
+
+        cities = self.env['liteapi.city'].search([
+            ('is_active', '=', True),
+            '|', '|',
+            ('catalog_synced_at', '=', False),
+            ('catalog_synced_at', '<', resync_before),
+            ('catalog_sync_offset', '>', 0),
+        ])
+        for city in cities:
+            if time.monotonic() >= deadline:
+                break
+            self.sync_city_hotels(city, deadline=deadline, page_size=config['page_size'])
+
+    @api.model
+    def sync_city_hotels(self, city, deadline=None, page_size=DEFAULT_PAGE_SIZE):
+        """
+        جلب فنادق مدينة صفحة بصفحة وحفظ كل صفحة بـ INSERT ... ON CONFLICT واحد.
+        كل صفحة تُثبَّت (commit) فوراً، لذا لا تبقى في الذاكرة إلا صفحة واحدة.
+        بدون deadline تُستخدم ميزانية وقت الـ Cron، والإزاحة المحفوظة تسمح بالإكمال لاحقاً.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self._get_sync_config()['time_budget']
+        client = self.env['liteapi.client']
+        offset = city.catalog_sync_offset or 0
+        started = time.monotonic()
+        totals = {'inserted': 0, 'updated': 0, 'received': 0}
+
+        while True:
+            response = client.make_request('/data/hotels', method='GET', params={
+                'countryCode': city.country_id.code,
+                'cityName': city.name,
+                'offset': offset,
+                'limit': page_size,
+            })
+            page = response.get('data', []) or []
+            if page:
+                inserted, updated = self._upsert_hotels(city, page)
+                totals['inserted'] += inserted
+                totals['updated'] += updated
+                totals['received'] += len(page)
+            offset += len(page)
+
+            done = len(page) < page_size
+            city.write({
+                'catalog_sync_offset': 0 if done else offset,
+                'catalog_synced_at': fields.Datetime.now() if done else city.catalog_synced_at,
+            })
+            self.env.cr.commit()
+
+            if done or time.monotonic() >= deadline:
+                break
+
+        elapsed = max(time.monotonic() - started, 0.001)
+        _logger.info(
+            f"🏨 Catalog sync {city.name}: {totals['received']} rows "
+            f"({totals['inserted']} new, {totals['updated']} changed) in {elapsed:.1f}s "
+            f"= {totals['received'] / elapsed:.0f} rows/sec"
+        )
+        return totals
+
+    @api.model
+    def _upsert_hotels(self, city, items):
+        """ حفظ صفحة فنادق بأمر SQL واحد؛ يعيد (عدد الجديد، عدد المعدل) """
+        # صف واحد لكل معرف (آخر ظهور يفوز): ON CONFLICT لا يقبل تعديل نفس الصف مرتين في أمر واحد
+        rows = {}
+        for item in items:
+            hotel_lite_id = item.get('id') or item.get('hotelId')
+            if not hotel_lite_id or not item.get('name'):
+                continue
+            try: stars = int(float(item.get('stars') or item.get('starRating') or 0))
+            except (TypeError, ValueError): stars = 0
+            rows[str(hotel_lite_id)] = (
+                item['name'], str(hotel_lite_id), city.id,
+                item.get('latitude') or 0.0, item.get('longitude') or 0.0,
+                stars, item.get('main_photo') or item.get('thumbnail') or None,
+            )
+        if not rows:
+            return 0, 0
+        rows = list(rows.values())
+
+        values_sql = ", ".join(
+            ["(%s, %s, %s, %s, %s, %s, %s, true, %s, (now() at time zone 'UTC'), %s, (now() at time zone 'UTC'))"] * len(rows)
+        )
+        params = [value for row in rows for value in row + (self.env.uid, self.env.uid)]
+        # التحديث فقط عند تغير القيم، حتى لا تتولد نسخ صفوف (bloat) بلا داعٍ عند إعادة المزامنة
+        self.env.cr.execute(f"""
+            INSERT INTO liteapi_hotel AS h
+                (name, liteapi_hotel_id, city_id, latitude, longitude, star_rating, image_url, is_cached,
+                 create_uid, create_date, write_uid, write_date)
+            VALUES {values_sql}
+            ON CONFLICT (liteapi_hotel_id) DO UPDATE SET
+                name = EXCLUDED.name,
+                latitude = EXCLUDED.latitude,
+                longitude = EXCLUDED.longitude,
+                star_rating = CASE WHEN EXCLUDED.star_rating > 0 THEN EXCLUDED.star_rating ELSE h.star_rating END,
+                image_url = COALESCE(EXCLUDED.image_url, h.image_url),
+                is_cached = true,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+            WHERE (h.name, h.latitude, h.longitude, h.star_rating, h.image_url)
+                IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.latitude, EXCLUDED.longitude,
+                                  CASE WHEN EXCLUDED.star_rating > 0 THEN EXCLUDED.star_rating ELSE h.star_rating END,
+                                  COALESCE(EXCLUDED.image_url, h.image_url))
+            RETURNING (xmax = 0) AS inserted
+        """, params)
+        flags = [row[0] for row in self.env.cr.fetchall()]
+        self.env['liteapi.hotel'].invalidate_model()
+        inserted = sum(1 for flag in flags if flag)
+        return inserted, len(flags) - inserted
+
+    @api.model
+    def sync_country_cities(self, country):
+        """ إضافة المدن الناقصة للدولة من /data/cities (غير مفعلة افتراضياً) """
+        client = self.env['liteapi.client']
+        response = client.make_request('/data/cities', method='GET', params={'countryCode': country.code})
+        names = {item.get('city') for item in response.get('data', []) or [] if item.get('city')}
+        City = self.env['liteapi.city']
+        existing = set(City.search([('country_id', '=', country.id)]).mapped('name'))
+        new_names = sorted(names - existing)
+        City.create([{
+            'name': name,
+            'liteapi_city_id': f"{country.code}-{name}",
+            'country_id': country.id,
+            'is_active': False,
+        } for name in new_names])
+        return len(new_names)
@@ -0,0 +1,99 @@
+import logging
+import os
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 5  # أخطاء متتالية قبل فتح الدائرة
+DEFAULT_RESET_SECONDS = 30  # مدة بقاء الدائرة مفتوحة قبل طلب التجربة (half-open)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    قاطع دائرة لكل Endpoint داخل الـ Worker:
+    closed -> open بعد failure_threshold أخطاء متتالية (انقطاع، مهلة، 5xx)،
+    open -> half_open بعد reset_seconds حيث يمر طلب تجربة واحد فقط،
+    ونجاحه يغلق الدائرة وفشله يعيد فتحها.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.stats = {'success': 0, 'failure': 0, 'rejected': 0, 'opened': 0}
+
+    def allow(self, reset_seconds):
+        """ يعيد 0 إن سُمح بالطلب، وإلا الثواني المتبقية حتى طلب التجربة """
+        with self._lock:
+            if self.state == CLOSED:
+                return 0
+            remaining = self.opened_at + reset_seconds - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return 0
+            self.stats['rejected'] += 1
+            return max(remaining, 1.0)
+
+    def is_open(self, reset_seconds):
+        """ فحص بدون تغيير الحالة: هل سيُرفض الطلب الآن؟ """
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            if self.state == HALF_OPEN:
+                return self.probe_in_flight
+            return time.monotonic() < self.opened_at + reset_seconds
+
+    def record_success(self):
+        with self._lock:
+            self.stats['success'] += 1
+            if self.state != CLOSED:
+                _logger.info(f"🟢 Circuit closed for {self.name}")
+            self.state = CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self, threshold):
+        with self._lock:
+            self.stats['failure'] += 1
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= threshold):
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probe_in_flight = False
+                self.stats['opened'] += 1
+                _logger.warning(f"🔴 Circuit opened for {self.name} after {self.failures} consecutive failures")
+
+
+_BREAKERS = {}
+_BREAKERS_PID = None
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(name):
+    """ قاطع واحد لكل Endpoint في العملية (يُنشأ من جديد بعد fork) """
+    global _BREAKERS, _BREAKERS_PID
+    with _BREAKERS_LOCK:
+        if _BREAKERS_PID != os.getpid():
+            _BREAKERS = {}
+            _BREAKERS_PID = os.getpid()
+        breaker = _BREAKERS.get(name)
+        if breaker is None:
+            breaker = _BREAKERS[name] = CircuitBreaker(name)
+        return breaker
+
+
+def breaker_stats():
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    return {breaker.name: dict(breaker.stats, state=breaker.state) for breaker in breakers}
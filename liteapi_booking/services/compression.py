@@ -0,0 +1,76 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IDENTITY = 'identity'
+
+# أخطاء فك الضغط (Google Brotli تسميها error و brotlipy تسميها Error)
+DECODE_ERRORS = (zlib.error,) + tuple(
+    error for error in (getattr(brotli, 'error', None), getattr(brotli, 'Error', None)) if error
+)
+
+
+def accept_encoding():
+    """ قيمة هيدر Accept-Encoding: brotli فقط إن كانت المكتبة مثبتة """
+    return 'br, gzip' if brotli is not None else 'gzip'
+
+
+class _Brotli:
+    def __init__(self):
+        self._decompressor = brotli.Decompressor()
+
+    def decompress(self, data):
+        # Google Brotli تسميها process، و brotlipy (نفس اسم الاستيراد) تسميها decompress
+        if hasattr(self._decompressor, 'process'):
+            return self._decompressor.process(data)
+        return self._decompressor.decompress(data)
+
+    def flush(self):
+        return b''
+
+
+def _decompressor(encoding):
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return zlib.decompressobj()
+    if encoding == 'br' and brotli is not None:
+        return _Brotli()
+    raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+
+def normalize_encoding(content_encoding):
+    return (content_encoding or IDENTITY).strip().lower() or IDENTITY
+
+
+def iter_decoded(chunks, content_encoding):
+    """
+    فك ضغط جسم الرد تدريجياً، دفعة بدفعة (للردود المتدفقة).
+    أخطاء فك الضغط تُرفع كـ ValueError (جسم غير صالح) مثل أخطاء JSON.
+    """
+    encoding = normalize_encoding(content_encoding)
+    if encoding == IDENTITY:
+        yield from chunks
+        return
+    decompressor = _decompressor(encoding)
+    try:
+        for chunk in chunks:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+        data = decompressor.flush()
+    except DECODE_ERRORS as e:
+        raise ValueError(f"Invalid {encoding} response body: {e}") from e
+    if data:
+        yield data
+
+
+def decode_body(data, content_encoding):
+    """ فك ضغط جسم رد مقروء كاملاً """
+    if normalize_encoding(content_encoding) == IDENTITY:
+        return data
+    return b''.join(iter_decoded([data], content_encoding))
+
@@ -0,0 +1,104 @@
+from odoo.exceptions import UserError
+
+from . import json_codec
+
+# أكواد ونصوص أخطاء LiteAPI التي تعني أن العرض (offerId) لم يعد صالحاً
+OFFER_EXPIRED_CODES = (4002,)
+OFFER_EXPIRED_MESSAGES = ('invalid offerid', 'offer expired', 'offer has expired')
+
+
+class LiteAPIError(UserError):
+    """
+    خطأ من LiteAPI أو من الاتصال بها، مع بيانات منظمة بدلاً من البحث في نص الرسالة:
+    status (كود HTTP)، code (كود خطأ LiteAPI)، endpoint، latency (ثواني)، retry_after.
+    retryable: هل إعادة نفس الطلب لاحقاً قد تنجح (للطلبات الآمنة للتكرار فقط).
+    """
+    retryable = False
+
+    def __init__(self, message, status=None, code=None, endpoint=None, latency=None, retry_after=None):
+        self.status = status
+        self.code = code
+        self.endpoint = endpoint
+        self.latency = latency
+        self.retry_after = retry_after
+        super().__init__(message)
+
+    def with_message(self, message):
+        """ نفس الخطأ (النوع والبيانات) برسالة جديدة للمستخدم """
+        return type(self)(
+            message, status=self.status, code=self.code, endpoint=self.endpoint,
+            latency=self.latency, retry_after=self.retry_after,
+        )
+
+
+class OfferExpired(LiteAPIError):
+    """ العرض انتهت صلاحيته أو لم يعد متاحاً (كود 4002 أو رسالة offerId غير صالح/منتهي) """
+
+
+class BadRequest(LiteAPIError):
+    """ HTTP 400 آخر (خطأ تحقق في الطلب): لا يُعاد ولا يُعتبر انتهاء عرض """
+
+
+class RateLimited(LiteAPIError):
+    """ HTTP 429 من LiteAPI """
+    retryable = True
+
+
+class UpstreamUnavailable(LiteAPIError):
+    """ HTTP 5xx من LiteAPI """
+    retryable = True
+
+
+class UpstreamTimeout(LiteAPIError):
+    """ انتهت مهلة الاتصال أو القراءة """
+    retryable = True
+
+
+class UpstreamConnectionError(LiteAPIError):
+    """ تعذر الاتصال أو انقطع أثناء الطلب """
+    retryable = True
+
+
+class InvalidResponse(LiteAPIError):
+    """ رد ناجح لكن جسمه ليس JSON صالحاً """
+
+
+class CircuitOpen(LiteAPIError):
+    """ الدائرة مفتوحة لهذا الـ Endpoint: الطلب رُفض محلياً بدون انتظار الـ API """
+    retryable = True
+
+
+def parse_error_code(response_text):
+    """ كود الخطأ ورسالته من جسم رد LiteAPI ({"error": {"code": ..., "message": ...}}) """
+    try:
+        data = json_codec.loads(response_text)
+    except (TypeError, ValueError):
+        return None, ''
+    if not isinstance(data, dict):
+        return None, ''
+    error = data.get('error')
+    if not isinstance(error, dict):
+        error = data
+    code = error.get('code')
+    try:
+        code = int(code)
+    except (TypeError, ValueError):
+        code = None
+    message = error.get('message') or error.get('description') or ''
+    return code, str(message)
+
+
+def error_from_response(endpoint, status, response_text, message, latency=None, retry_after=None):
+    """ تصنيف رد HTTP غير ناجح إلى نوع الخطأ المناسب """
+    code, upstream_message = parse_error_code(response_text)
+    kwargs = {'status': status, 'code': code, 'endpoint': endpoint, 'latency': latency, 'retry_after': retry_after}
+    upstream_message = upstream_message.lower()
+    if code in OFFER_EXPIRED_CODES or any(marker in upstream_message for marker in OFFER_EXPIRED_MESSAGES):
+        return OfferExpired(message, **kwargs)
+    if status == 400:
+        return BadRequest(message, **kwargs)
+    if status == 429:
+        return RateLimited(message, **kwargs)
+    if status >= 500:
+        return UpstreamUnavailable(message, **kwargs)
+    return LiteAPIError(message, **kwargs)
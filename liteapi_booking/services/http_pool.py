@@ -0,0 +1,164 @@
+import http.client
+import logging
+import os
+import select
+import ssl
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAXSIZE = 10
+DEFAULT_IDLE_TIMEOUT = 60  # ثواني
+
+# أخطاء تعني أن الطرف الآخر أغلق اتصالاً خاملاً قبل أن نعيد استخدامه
+STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+_SSL_CONTEXT = ssl._create_unverified_context()
+
+
+class ConnectionPool:
+    """
+    مجمع اتصالات Keep-Alive لكل (scheme, host, port) داخل العملية (Worker) الواحدة.
+    يعيد استخدام اتصالات TCP/TLS بدلاً من فتح اتصال جديد مع كل طلب.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._pid = os.getpid()
+        self.stats = {'created': 0, 'reused': 0, 'stale': 0, 'evicted': 0}
+
+    def _check_fork(self):
+        # في وضع prefork يرث كل Worker المقابس من العملية الأم، ولا يجوز مشاركتها
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._idle = {}
+            self._pid = os.getpid()
+
+    @staticmethod
+    def _new_connection(scheme, host, port, timeout):
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port=port, timeout=timeout, context=_SSL_CONTEXT)
+        return http.client.HTTPConnection(host, port=port, timeout=timeout)
+
+    @staticmethod
+    def _is_stale(conn):
+        """
+        الاتصال الخامل السليم لا يجب أن يكون قابلاً للقراءة؛
+        إن كان كذلك فالسيرفر أرسل EOF (أو بيانات غير متوقعة) ولا يصلح لإعادة الاستخدام.
+        """
+        sock = conn.sock
+        if sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def acquire(self, scheme, host, port, timeout):
+        """ يعيد (conn, reused) """
+        self._check_fork()
+        key = (scheme, host, port)
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key) or []
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used > self.idle_timeout:
+                    self.stats['evicted'] += 1
+                    conn.close()
+                    continue
+                if self._is_stale(conn):
+                    self.stats['stale'] += 1
+                    conn.close()
+                    continue
+                self.stats['reused'] += 1
+                conn.timeout = timeout
+                conn.sock.settimeout(timeout)
+                return conn, True
+            self.stats['created'] += 1
+        return self._new_connection(scheme, host, port, timeout), False
+
+    def release(self, scheme, host, port, conn):
+        self._check_fork()
+        if conn.sock is None:
+            return
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) >= self.maxsize:
+                conn.close()
+                return
+            idle.append((conn, time.monotonic()))
+
+    def clear(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _last_used in idle:
+                    conn.close()
+            self._idle = {}
+
+    def request(self, scheme, host, port, method, path, body=None, headers=None, timeout=45, retry_stale=True):
+        """
+        إرسال الطلب وقراءة الرد كاملاً ثم إعادة الاتصال للمجمع.
+        إذا تبين أن الاتصال المعاد استخدامه ميت، نعيد الاتصال مرة واحدة بشفافية
+        (فقط عند retry_stale=True، أي للطلبات التي يجوز إعادة إرسالها).
+        يعيد (response, data).
+        """
+        conn, response, data = self._exchange(scheme, host, port, method, path, body, headers, timeout, retry_stale, True)
+        self.finish(scheme, host, port, conn, response)
+        return response, data
+
+    def open(self, scheme, host, port, method, path, body=None, headers=None, timeout=45, retry_stale=True):
+        """
+        مثل request لكن بدون قراءة جسم الرد، ليُقرأ تدريجياً (response.read(amt)).
+        يعيد (conn, response)، ويجب استدعاء finish بعد الانتهاء من القراءة أو عند التوقف.
+        """
+        conn, response, _data = self._exchange(scheme, host, port, method, path, body, headers, timeout, retry_stale, False)
+        return conn, response
+
+    def finish(self, scheme, host, port, conn, response):
+        """ إعادة الاتصال للمجمع إن قُرئ الرد كاملاً، وإلا إغلاقه (بقايا الرد تفسد الطلب التالي) """
+        if response.will_close or not response.isclosed():
+            conn.close()
+        else:
+            self.release(scheme, host, port, conn)
+
+    def _exchange(self, scheme, host, port, method, path, body, headers, timeout, retry_stale, read):
+        conn, reused = self.acquire(scheme, host, port, timeout)
+        try:
+            return (conn,) + self._send(conn, method, path, body, headers, read)
+        except STALE_ERRORS:
+            conn.close()
+            if not (reused and retry_stale):
+                raise
+            _logger.info(f"♻️ Stale pooled connection to {host}, reconnecting")
+            self.stats['stale'] += 1
+            conn = self._new_connection(scheme, host, port, timeout)
+            try:
+                return (conn,) + self._send(conn, method, path, body, headers, read)
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            conn.close()
+            raise
+
+    @staticmethod
+    def _send(conn, method, path, body, headers, read):
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response, (response.read() if read else None)
+
+
+# مجمع واحد لكل عملية، يستخدمه liteapi.client لجميع الطلبات
+POOL = ConnectionPool()
@@ -0,0 +1,41 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson (أسرع بعدة أضعاف في التحليل والتسلسل) إن كان مثبتاً، وإلا مكتبة json القياسية
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+# فواصل orjson المضغوطة نفسها في المكتبة القياسية
+_SEPARATORS = (',', ':')
+
+
+def dumps(obj):
+    """
+    تسلسل إلى نص JSON (str) بصيغة واحدة مهما كانت المكتبة: بدون مسافات بين العناصر
+    والحروف غير اللاتينية كما هي (بدون \\uXXXX)، فلا يتغير شكل booking_details والسجلات
+    بتثبيت orjson أو إزالته. للإرسال عبر الشبكة يُرمّز الناتج بـ UTF-8.
+    القيم التي لا يدعمها orjson (مثل الأعداد الأكبر من 64 بت) تمر عبر مكتبة json القياسية.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=_SEPARATORS)
+
+
+def loads(data):
+    """
+    تحليل نص JSON (str أو bytes). ما يرفضه orjson ويقبله json القياسي (NaN، أعداد ضخمة)
+    يُعاد تحليله بالمكتبة القياسية، والنص غير الصالح يرفع ValueError في الحالتين.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            pass
+    return json.loads(data)
@@ -0,0 +1,116 @@
+import codecs
+import json
+import re
+
+# حجم القراءة من المقبس في كل دفعة (بايت)
+DEFAULT_CHUNK_BYTES = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+
+
+class _StreamBuffer:
+    """ نص JSON يصل على دفعات bytes؛ يحتفظ فقط بالجزء الذي لم يُحلل بعد """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            return self._utf8.decode(b'', final=True)
+        return self._utf8.decode(chunk)
+
+    def ensure(self, size):
+        """ يقرأ حتى يتوفر size حرف بعد pos (أو ينتهي الرد)، ويتخلص من الجزء المحلل """
+        available = len(self.text) - self.pos
+        if available >= size or self.eof:
+            return available >= size
+        parts = [self.text[self.pos:]]
+        while available < size and not self.eof:
+            part = self._read()
+            parts.append(part)
+            available += len(part)
+        self.text = ''.join(parts)
+        self.pos = 0
+        return available >= size
+
+    def peek(self, required=True):
+        """ أول حرف بعد المسافات البيضاء (None عند نهاية الرد إن لم يكن required) """
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.ensure(1):
+                if required:
+                    raise ValueError("Unexpected end of JSON stream")
+                return None
+
+    def take(self, expected):
+        char = self.peek()
+        if char not in expected:
+            raise ValueError(f"Expected one of {expected!r} in JSON stream, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        القيمة التالية كاملة عبر raw_decode (المحلل السريع المكتوب بـ C).
+        إن لم تكتمل بعد نقرأ حتى يتضاعف المتاح قبل المحاولة التالية، فتبقى التكلفة خطية
+        حتى لعنصر كبير يمتد عبر دفعات كثيرة.
+        """
+        self.peek()
+        size = len(self.text) - self.pos
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                size *= 2
+                self.ensure(size)
+                continue
+            if end == len(self.text) and not self.eof:
+                # رقم أو true/false/null في آخر الدفعة قد يكون مقتطعاً ("12" من "125")
+                size = end - self.pos + 1
+                self.ensure(size)
+                continue
+            self.pos = end
+            return value
+
+
+def iter_array_items(chunks, key):
+    """
+    تحليل تدريجي لرد JSON كائنه الأعلى {"<key>": [...], ...} من دفعات bytes (مثل قراءات المقبس)،
+    ويعيد عناصر المصفوفة key واحداً تلو الآخر فور اكتمال كل عنصر، بدون الاحتفاظ بالرد كاملاً.
+    باقي قيم الكائن تُحلل وتُهمل. الرد الفارغ لا يعيد شيئاً، والرد غير الصالح يرفع ValueError.
+    """
+    buffer = _StreamBuffer(chunks)
+    if buffer.peek(required=False) is None:
+        return
+    buffer.take('{')
+    if buffer.peek() == '}':
+        return
+    while True:
+        name = buffer.value()
+        if not isinstance(name, str):
+            raise ValueError("Invalid object key in JSON stream")
+        buffer.take(':')
+        if name == key and buffer.peek() == '[':
+            buffer.take('[')
+            if buffer.peek() == ']':
+                buffer.take(']')
+            else:
+                while True:
+                    yield buffer.value()
+                    if buffer.take(',]') == ']':
+                        break
+        else:
+            buffer.value()
+        if buffer.take(',}') == '}':
+            return
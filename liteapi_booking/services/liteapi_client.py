@@ -1,11 +1,34 @@
+import http.client
 import logging
-import json
+import os
+import random
+import threading
+import time
 import urllib.parse
-import http.client
-import ssl
-from odoo import models, api, _
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from odoo import models, api, fields, _
 from odoo.exceptions import AccessError, UserError
 
+from .audit_queue import AUDIT_QUEUE, insert_audit_rows
+from .circuit_breaker import DEFAULT_FAILURE_THRESHOLD, DEFAULT_RESET_SECONDS, get_breaker
+from .compression import accept_encoding, decode_body, iter_decoded, normalize_encoding
+from .exceptions import (
+    CircuitOpen, InvalidResponse, LiteAPIError, UpstreamConnectionError, UpstreamTimeout,
+    error_from_response,
+)
+from . import json_codec
+from .http_pool import POOL
+from .json_stream import DEFAULT_CHUNK_BYTES, iter_array_items
+from .metrics import (
+    JSON_DECODE_SECONDS, UPSTREAM_DECODED_BYTES, UPSTREAM_LATENCY, UPSTREAM_REQUEST_BYTES, UPSTREAM_REQUESTS,
+    UPSTREAM_RESPONSE_BYTES, UPSTREAM_WIRE_BYTES,
+)
+from .retry_policy import (
+    DEFAULT_MAX_RETRIES, MAX_RETRY_AFTER_SECONDS, RETRY_BUDGET, RETRYABLE_STATUSES,
+    backoff_delay, parse_retry_after,
+)
+
 _logger = logging.getLogger(__name__)
 
 ALLOWED_ENDPOINTS = [
@@ -22,6 +45,31 @@ ALLOWED_ENDPOINTS = [
     '/data/places'
 ]
 
+# مهلة الاتصال لكل Endpoint (ثواني): قصيرة للأسعار الدنيا وطويلة للحجز النهائي
+# (يمكن تعديلها عبر liteapi.endpoint_timeouts بصيغة JSON، مثل {"/hotels/rates": 20})
+DEFAULT_TIMEOUT = 20
+ENDPOINT_TIMEOUTS = {
+    '/hotels/min-rates': 15,
+    '/hotels/rates': 30,
+    '/rates/prebook': 30,
+    '/rates/book': 60,
+    '/data/hotels': 30,
+}
+
+# طلبات POST آمنة للتكرار (قراءة أسعار فقط). طلبات GET آمنة دائماً،
+# و /rates/prebook و /rates/book لا تُعاد تلقائياً أبداً
+IDEMPOTENT_POST_ENDPOINTS = ('/hotels/rates', '/hotels/min-rates')
+
+# الحد الافتراضي لحجم جسم سجلات النجاح قبل الضغط (بايت)
+DEFAULT_AUDIT_MAX_BYTES = 256 * 1024
+
+# الحد الأقصى للطلبات المتزامنة لكل Worker في make_requests
+MAX_PARALLEL_REQUESTS = 8
+
+_EXECUTOR = None
+_EXECUTOR_PID = None
+_EXECUTOR_LOCK = threading.Lock()
+
 class LiteAPIClient(models.AbstractModel):
     _name = 'liteapi.client'
     _description = 'LiteAPI Client Service'
@@ -34,21 +82,56 @@ class LiteAPIClient(models.AbstractModel):
         return base_url, api_key
 
     @api.model
-    def _log_call(self, endpoint, result, details=""):
+    def _log_call(self, endpoint, result, details="", cache_hit=False):
         """
         تسجيل العمليات في السجل مع دعم النصوص الطويلة.
+        cache_hit: علامة منظمة لأحداث البحث (تستخدمها لوحة التحكم بدلاً من البحث في النص).
+        افتراضياً يُضاف السجل لطابور داخل الذاكرة ويُكتب على دفعات من خيط خلفي
+        (liteapi.audit_async=False أو context liteapi_audit_sync للكتابة المتزامنة القديمة).
         """
+        ICP = self.env['ir.config_parameter'].sudo()
+        vals = {
+            'name': endpoint,
+            'timestamp': fields.Datetime.now(),
+            'user_id': self.env.uid,
+            'result': result,
+            'cache_hit': cache_hit,
+            # [MODIFIED] تمت إزالة القيد [:1000] للسماح بتسجيل كامل المحتوى
+            # التفاصيل تُخزن مضغوطة؛ الأخطاء تُحفظ كاملة دائماً، وأجسام النجاح تخضع للحد الأقصى والعينة
+            'details': details,
+            'max_bytes': 0,
+        }
+        if result == 'success':
+            sample_rate = float(ICP.get_param('liteapi.audit_success_sample_rate', '1.0'))
+            if sample_rate < 1.0 and random.random() >= sample_rate:
+                vals['details'] = self._summarize_details(details)
+            vals['max_bytes'] = int(ICP.get_param('liteapi.audit_max_bytes', DEFAULT_AUDIT_MAX_BYTES))
+
+        if not self.env.context.get('liteapi_audit_sync') and self._audit_async_enabled():
+            AUDIT_QUEUE.put(self.env.cr.dbname, vals)
+            return
+
         try:
-            self.env['liteapi.audit.log'].sudo().create({
-                'name': endpoint,
-                'user_id': self.env.uid,
-                'result': result,
-                # [MODIFIED] تمت إزالة القيد [:1000] للسماح بتسجيل كامل المحتوى
-                'details': details 
-            })
+            insert_audit_rows(self.env.cr, [vals])
         except Exception as e:
             _logger.error(f"Failed to write to audit log: {e}")
 
+    @api.model
+    def _summarize_details(self, details):
+        """ سطر الرابط والحالة فقط، لسجلات النجاح التي لم تدخل العينة """
+        lines = [line for line in (details or '').splitlines() if line.startswith(('URL:', 'Status:'))]
+        return "\n".join(lines + ["[body not sampled]"])
+
+    @api.model
+    def _audit_async_enabled(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return ICP.get_param('liteapi.audit_async', 'True').lower() in ('1', 'true')
+
+    @api.model
+    def _compression_enabled(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return ICP.get_param('liteapi.compression', 'True').lower() in ('1', 'true')
+
     @api.model
     def check_safety(self, endpoint):
         is_allowed = False
@@ -61,9 +144,51 @@ class LiteAPIClient(models.AbstractModel):
         return True
 
     @api.model
-    def make_request(self, endpoint, method='GET', custom_base_url=None, **kwargs):
+    def _endpoint_key(self, endpoint):
+        """ أطول عنصر مطابق في القائمة المسموحة (مثلاً /rates/book وليس /rates)، مفتاح القاطع والمهلة """
+        path = endpoint.split('?', 1)[0]
+        matches = [allowed for allowed in ALLOWED_ENDPOINTS if path == allowed or path.startswith(allowed + '/')]
+        return max(matches, key=len) if matches else path
+
+    @api.model
+    def _get_timeout(self, endpoint_key):
+        ICP = self.env['ir.config_parameter'].sudo()
+        overrides = ICP.get_param('liteapi.endpoint_timeouts')
+        if overrides:
+            try:
+                timeout = json_codec.loads(overrides).get(endpoint_key)
+                if timeout:
+                    return float(timeout)
+            except (ValueError, AttributeError):
+                _logger.warning(f"Invalid liteapi.endpoint_timeouts: {overrides}")
+        return ENDPOINT_TIMEOUTS.get(endpoint_key, DEFAULT_TIMEOUT)
+
+    @api.model
+    def _get_breaker_config(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        threshold = int(ICP.get_param('liteapi.breaker_failure_threshold', DEFAULT_FAILURE_THRESHOLD))
+        reset_seconds = float(ICP.get_param('liteapi.breaker_reset_seconds', DEFAULT_RESET_SECONDS))
+        return threshold, reset_seconds
+
+    @api.model
+    def _get_max_retries(self, method, endpoint_key):
+        if method.upper() != 'GET' and endpoint_key not in IDEMPOTENT_POST_ENDPOINTS:
+            return 0
+        ICP = self.env['ir.config_parameter'].sudo()
+        return int(ICP.get_param('liteapi.retry_max_attempts', DEFAULT_MAX_RETRIES))
+
+    @api.model
+    def is_circuit_open(self, endpoint):
+        """ هل سيُرفض طلب لهذا الـ Endpoint فوراً؟ (ليختار المستدعي البديل مباشرة بدل الانتظار) """
+        _threshold, reset_seconds = self._get_breaker_config()
+        return get_breaker(self._endpoint_key(endpoint)).is_open(reset_seconds)
+
+    @api.model
+    def _prepare_request(self, endpoint, method='GET', custom_base_url=None, stream_key=None, transform=None, **kwargs):
         """
-        تنفيذ طلب HTTP مع تسجيل تفصيلي (Full Logging) للإرسال والاستقبال.
+        تجهيز الطلب (الرابط، الهيدرز، البودي، نص السجل) بدون إرساله.
+        يحتاج self.env لذلك يجب استدعاؤه من خيط الطلب الأصلي.
+        stream_key: اسم المصفوفة التي يُحلل رد النجاح عناصرها تدريجياً (انظر StreamedResponse).
         """
         self.check_safety(endpoint)
         base_url, api_key = self._get_config()
@@ -81,7 +206,9 @@ class LiteAPIClient(models.AbstractModel):
         
         try:
             parsed = urllib.parse.urlparse(full_url)
-            host = parsed.netloc
+            scheme = parsed.scheme or 'https'
+            host = parsed.hostname
+            port = parsed.port or (443 if scheme == 'https' else 80)
             path = parsed.path
         except Exception as e:
             raise UserError(f"Invalid URL Format: {full_url}")
@@ -92,67 +219,436 @@ class LiteAPIClient(models.AbstractModel):
             path = f"{path}?{query_string}"
 
         body = None
+        body_text = None
         if method.upper() == 'POST':
             json_payload = kwargs.get('json', {})
-            body = json.dumps(json_payload)
+            body_text = json_codec.dumps(json_payload)
+            # bytes صريحة: http.client يرمّز النص (str) بـ Latin-1 فيفشل مع العربية
+            body = body_text.encode('utf-8')
 
         headers = {
             "X-API-Key": api_key,
             "Content-Type": "application/json",
             "Accept": "application/json",
+            # gzip (و brotli إن كانت مثبتة)؛ فك الضغط يتم تلقائياً في _send_once و StreamedResponse
+            "Accept-Encoding": accept_encoding() if self._compression_enabled() else "identity",
             "Accept-Language": self.env.context.get('lang', 'en_US')[:2], 
             "User-Agent": "Odoo-Native-Client/1.0",
-            "Connection": "close"
+            "Connection": "keep-alive"
         }
 
+        endpoint_key = self._endpoint_key(endpoint)
+        breaker_threshold, breaker_reset = self._get_breaker_config()
+
         # إعداد متغير لتجميع تفاصيل السجل
         log_details = f"=== REQUEST ===\nURL: {method} {full_url}\n"
         if body:
-            log_details += f"Body:\n{body}\n"
+            log_details += f"Body:\n{body_text}\n"
         else:
             log_details += "Body: [Empty]\n"
 
-        try:
-            _logger.info(f"⚡ Request: {method} {full_url}")
-            if body:
-                _logger.info(f"📦 Body: {body}")
-            
-            context = ssl._create_unverified_context()
-            conn = http.client.HTTPSConnection(host, port=443, timeout=45, context=context)
+        return {
+            'endpoint': endpoint,
+            'method': method,
+            'full_url': full_url,
+            'scheme': scheme,
+            'host': host,
+            'port': port,
+            'path': path,
+            'body': body,
+            'body_text': body_text,
+            'headers': headers,
+            'log_details': log_details,
+            'endpoint_key': endpoint_key,
+            'timeout': self._get_timeout(endpoint_key),
+            'breaker_threshold': breaker_threshold,
+            'breaker_reset': breaker_reset,
+            'max_retries': self._get_max_retries(method, endpoint_key),
+            'stream_key': stream_key,
+            'transform': transform,
+        }
+
+    @api.model
+    def _handle_response(self, spec, status, response_text):
+        """ تسجيل الرد وتحويله إلى dict أو رفع خطأ (في خيط الطلب الأصلي) """
+        endpoint = spec['endpoint']
+
+        if isinstance(response_text, StreamedResponse):
+            # رد متدفق قُرئ داخل خيط make_requests: عناصره جاهزة، والسجل يحفظ ملخصاً بدل الجسم
+            self._log_call(endpoint, 'success', spec['log_details'] + response_text.summary())
+            return {spec['stream_key']: response_text.items}
+
+        # إضافة الرد إلى السجل
+        log_details = spec['log_details'] + f"\n=== RESPONSE ===\nStatus: {status}\nBody:\n{response_text}"
+
+        _logger.info(f"✨ Response Status: {status}")
+        if status not in [200, 201]:
+             _logger.warning(f"⚠️ Response Error Body: {response_text}")
+
+        if status in [200, 201]:
+            # [LOG] تسجيل النجاح مع التفاصيل الكاملة
+            self._log_call(endpoint, 'success', log_details)
             
-            conn.request(method, path, body=body, headers=headers)
+            if not response_text.strip():
+                 return {}
+            decode_started = time.perf_counter()
+            try:
+                return json_codec.loads(response_text)
+            except ValueError:
+                raise InvalidResponse(
+                    f"Invalid JSON from [{spec['full_url']}]", status=status,
+                    endpoint=spec['endpoint_key'], latency=spec.get('latency')
+                )
+            finally:
+                JSON_DECODE_SECONDS.observe(time.perf_counter() - decode_started, endpoint=spec['endpoint_key'])
+        else:
+            # [LOG] تسجيل الخطأ مع التفاصيل الكاملة
+            self._log_call(endpoint, 'error', log_details)
             
-            response = conn.getresponse()
-            response_data = response.read()
-            conn.close()
+            msg = f"API Error {status} from [{spec['full_url']}]: {response_text}"
+            # نوع الخطأ (OfferExpired، RateLimited، ...) يُحدد هنا مرة واحدة من الكود وليس من نص الرسالة
+            raise error_from_response(
+                spec['endpoint_key'], status, response_text, msg,
+                latency=spec.get('latency'), retry_after=parse_retry_after(spec.get('retry_after'))
+            )
 
-            response_text = response_data.decode('utf-8')
-            
-            # إضافة الرد إلى السجل
-            log_details += f"\n=== RESPONSE ===\nStatus: {response.status}\nBody:\n{response_text}"
-
-            _logger.info(f"✨ Response Status: {response.status}")
-            if response.status not in [200, 201]:
-                 _logger.warning(f"⚠️ Response Error Body: {response_text}")
-
-            if response.status in [200, 201]:
-                # [LOG] تسجيل النجاح مع التفاصيل الكاملة
-                self._log_call(endpoint, 'success', log_details)
-                
-                if not response_text.strip():
-                     return {}
-                return json.loads(response_text)
-            else:
-                # [LOG] تسجيل الخطأ مع التفاصيل الكاملة
-                self._log_call(endpoint, 'error', log_details)
-                
-                msg = f"API Error {response.status} from [{full_url}]: {response_text}"
-                raise UserError(msg)
+    @api.model
+    def _handle_failure(self, spec, e):
+        """ تسجيل أخطاء الاتصال (مثل التايم آوت أو انقطاع النت) ثم رفعها كـ LiteAPIError مصنف """
+        if isinstance(e, CircuitOpen):
+            # رُفض محلياً بدون اتصال؛ يُسجل كـ blocked ويُرفع كما هو ليتعرف عليه المستدعي
+            self._log_call(spec['endpoint'], 'blocked', spec['log_details'] + f"\n\n=== CIRCUIT OPEN ===\n{e}")
+            raise e
+        log_details = spec['log_details'] + f"\n\n=== EXCEPTION ===\n{str(e)}"
+        self._log_call(spec['endpoint'], 'error', log_details)
+        
+        _logger.exception("Native HTTP Failed")
+        kwargs = {'endpoint': spec['endpoint_key'], 'latency': spec.get('latency')}
+        if isinstance(e, LiteAPIError):
+            raise e
+        if isinstance(e, TimeoutError):
+            raise UpstreamTimeout(f"Timeout after {spec['timeout']:.0f}s from [{spec['full_url']}]", **kwargs) from e
+        if isinstance(e, (OSError, http.client.HTTPException)):
+            raise UpstreamConnectionError(f"Connection error from [{spec['full_url']}]: {e}", **kwargs) from e
+        if isinstance(e, ValueError):
+            # JSON غير صالح أثناء التحليل التدريجي لرد متدفق
+            raise InvalidResponse(f"Invalid JSON from [{spec['full_url']}]: {e}", **kwargs) from e
+        raise LiteAPIError(str(e), **kwargs) from e
+
+    @api.model
+    def make_request(self, endpoint, method='GET', custom_base_url=None, **kwargs):
+        """
+        تنفيذ طلب HTTP مع تسجيل تفصيلي (Full Logging) للإرسال والاستقبال.
+        """
+        spec = self._prepare_request(endpoint, method=method, custom_base_url=custom_base_url, **kwargs)
+        try:
+            status, response_text = _send_prepared(spec)
+        except Exception as e:
+            self._handle_failure(spec, e)
+        return self._handle_response(spec, status, response_text)
+
+    @api.model
+    def stream_request(self, endpoint, method='POST', stream_key='data', transform=None, custom_base_url=None, **kwargs):
+        """
+        مثل make_request للردود الكبيرة (مثل /hotels/rates): يعيد مولّداً لعناصر المصفوفة stream_key
+        تُحلل تدريجياً من المقبس أثناء وصولها، بدلاً من قراءة الرد كاملاً ونسخه لنص وللسجل ثم json.loads.
+        transform: دالة نقية تُطبق على كل عنصر فور تحليله (لإبقاء الحقول المطلوبة فقط).
+        أخطاء الاتصال وحالة الرد تُرفع فوراً، وأخطاء قراءة الجسم تُرفع من المولّد.
+        """
+        spec = self._prepare_request(
+            endpoint, method=method, custom_base_url=custom_base_url,
+            stream_key=stream_key, transform=transform, **kwargs
+        )
+        try:
+            status, response_text = _send_prepared(spec)
+        except Exception as e:
+            self._handle_failure(spec, e)
+        if not isinstance(response_text, StreamedResponse):
+            # ردود الأخطاء تُقرأ كاملاً وتُرفع كـ LiteAPIError مصنف
+            data = self._handle_response(spec, status, response_text)
+            return iter(data.get(stream_key) or [])
+        return self._iter_stream(spec, response_text)
 
+    @api.model
+    def _iter_stream(self, spec, stream):
+        try:
+            yield from stream
         except Exception as e:
-            # تسجيل أخطاء الاتصال (مثل التايم آوت أو انقطاع النت)
-            log_details += f"\n\n=== EXCEPTION ===\n{str(e)}"
-            self._log_call(endpoint, 'error', log_details)
-            
-            _logger.exception("Native HTTP Failed")
-            raise UserError(str(e))
\ No newline at end of file
+            self._handle_failure(spec, e)
+        # السجل يحفظ ملخص الرد (عدد العناصر والحجم) بدل نسخة من الجسم
+        self._log_call(spec['endpoint'], 'success', spec['log_details'] + stream.summary())
+
+    @api.model
+    def make_requests(self, requests, max_workers=None):
+        """
+        تنفيذ عدة طلبات (من القائمة المسموحة) بالتوازي على Thread Pool محدود.
+        كل عنصر dict بنفس معاملات make_request: {'endpoint': ..., 'method': ..., 'json': ..., 'params': ..., 'custom_base_url': ...}
+        max_workers: حد إضافي لعدد الطلبات المتزامنة لهذه الدفعة (لا يتجاوز MAX_PARALLEL_REQUESTS).
+        عنصر فيه 'stream_key' يُحلل رده تدريجياً داخل الخيط ويعيد {stream_key: [العناصر بعد transform]}.
+        يعيد قائمة بنفس الترتيب من (result, error) حيث أحدهما None.
+        زمن الانتظار الكلي = زمن أبطأ طلب بدلاً من مجموع الأزمنة.
+        """
+        results = [None] * len(requests)
+        prepared = []
+        for index, req in enumerate(requests):
+            req = dict(req)
+            endpoint = req.pop('endpoint')
+            try:
+                prepared.append((index, self._prepare_request(endpoint, **req)))
+            except Exception as e:
+                results[index] = (None, e)
+
+        # الإرسال فقط يتم في الخيوط؛ التجهيز والتسجيل وتحليل الرد تبقى هنا لأن env غير آمن بين الخيوط
+        if len(prepared) == 1:
+            futures = [(index, spec, None) for index, spec in prepared]
+        elif max_workers and max_workers < len(prepared):
+            submitted = _submit_bounded(prepared, max_workers)
+            futures = [(index, spec, submitted[index]) for index, spec in prepared]
+        else:
+            executor = _get_executor()
+            futures = [(index, spec, executor.submit(_send_collected, spec)) for index, spec in prepared]
+
+        for index, spec, future in futures:
+            try:
+                try:
+                    status, response_text = future.result() if future else _send_collected(spec)
+                except Exception as e:
+                    self._handle_failure(spec, e)
+                results[index] = (self._handle_response(spec, status, response_text), None)
+            except Exception as e:
+                results[index] = (None, e)
+        return results
+
+
+def _send_prepared(spec):
+    """
+    إرسال طلب مجهز عبر مجمع الاتصالات وإرجاع (status, response_text).
+    لا تستخدم env إطلاقاً، لذا يمكن تشغيلها من خيوط make_requests.
+    قاطع الدائرة يرفض الطلب فوراً (CircuitOpen) إذا كان الـ Endpoint متعطلاً،
+    ويحسب الانقطاع والمهلة وردود 5xx أخطاءً.
+
+    الطلبات الآمنة للتكرار (spec['max_retries'] > 0) تُعاد عند انقطاع الاتصال أو ردود
+    429/502/503/504، بانتظار Exponential Backoff مع Jitter أو Retry-After إن أرسله الـ API،
+    وضمن ميزانية إعادة محاولة مشتركة للعملية. انتهاء المهلة (Timeout) لا يُعاد.
+    """
+    RETRY_BUDGET.deposit()
+    started = time.monotonic()
+    try:
+        return _send_with_retries(spec)
+    finally:
+        # زمن الطلب الكلي (مع إعادات المحاولة) لأنواع الأخطاء والمقاييس
+        spec['latency'] = time.monotonic() - started
+
+
+def _send_collected(spec):
+    """ _send_prepared لخيوط make_requests: الرد المتدفق يُقرأ ويُحلل كاملاً داخل الخيط """
+    status, response_text = _send_prepared(spec)
+    if isinstance(response_text, StreamedResponse):
+        response_text.collect()
+    return status, response_text
+
+
+def _send_with_retries(spec):
+    attempt = 0
+    while True:
+        try:
+            status, response_text, retry_after = _send_once(spec)
+            spec['retry_after'] = retry_after
+        except (ConnectionError, http.client.HTTPException) as e:
+            if not _may_retry(spec, attempt):
+                raise
+            delay = backoff_delay(attempt)
+            reason = type(e).__name__
+        else:
+            if status not in RETRYABLE_STATUSES or not _may_retry(spec, attempt):
+                return status, response_text
+            delay = parse_retry_after(retry_after)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            elif delay > MAX_RETRY_AFTER_SECONDS:
+                return status, response_text
+            reason = f"HTTP {status}"
+        attempt += 1
+        _logger.warning(f"🔁 Retry {attempt}/{spec['max_retries']} for {spec['endpoint']} after {reason} (waiting {delay:.2f}s)")
+        time.sleep(delay)
+
+
+def _may_retry(spec, attempt):
+    return attempt < spec['max_retries'] and RETRY_BUDGET.withdraw()
+
+
+def _send_once(spec):
+    """ محاولة واحدة عبر قاطع الدائرة؛ تعيد (status, response_text أو StreamedResponse, Retry-After) """
+    breaker = get_breaker(spec['endpoint_key'])
+    retry_after = breaker.allow(spec['breaker_reset'])
+    if retry_after:
+        UPSTREAM_REQUESTS.inc(endpoint=spec['endpoint_key'], status='circuit_open')
+        raise CircuitOpen(
+            f"LiteAPI {spec['endpoint_key']} is temporarily unavailable (circuit open, retry in {retry_after:.0f}s)",
+            endpoint=spec['endpoint_key'], retry_after=retry_after
+        )
+
+    _logger.info(f"⚡ Request: {spec['method']} {spec['full_url']}")
+    if spec['body']:
+        _logger.info(f"📦 Body: {spec['body_text']}")
+
+    # اتصال Keep-Alive من المجمع بدلاً من Handshake جديد في كل طلب
+    # لا نعيد إرسال طلب الحجز النهائي تلقائياً حتى لو كان الاتصال ميتاً
+    endpoint_key = spec['endpoint_key']
+    if spec['body']:
+        UPSTREAM_REQUEST_BYTES.observe(len(spec['body']), endpoint=endpoint_key)
+    stream = spec.get('stream_key') is not None
+    target = (spec['scheme'], spec['host'], spec['port'], spec['method'], spec['path'])
+    options = {
+        'body': spec['body'], 'headers': spec['headers'], 'timeout': spec['timeout'],
+        'retry_stale': spec['endpoint'] != '/rates/book',
+    }
+    started = time.perf_counter()
+    try:
+        if stream:
+            # الجسم لا يُقرأ هنا؛ الزمن المقاس للرد المتدفق هو زمن وصول الهيدرز
+            conn, response = POOL.open(*target, **options)
+        else:
+            response, response_data = POOL.request(*target, **options)
+    except Exception as e:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint_key)
+        UPSTREAM_REQUESTS.inc(endpoint=endpoint_key, status=type(e).__name__)
+        breaker.record_failure(spec['breaker_threshold'])
+        raise
+    UPSTREAM_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint_key)
+    UPSTREAM_REQUESTS.inc(endpoint=endpoint_key, status=response.status)
+    if response.status >= 500:
+        breaker.record_failure(spec['breaker_threshold'])
+    else:
+        breaker.record_success()
+    if stream:
+        if response.status in (200, 201):
+            return response.status, StreamedResponse(spec, conn, response), response.getheader('Retry-After')
+        # ردود الأخطاء صغيرة وتُقرأ كاملاً كالمعتاد
+        try:
+            response_data = response.read()
+        finally:
+            POOL.finish(spec['scheme'], spec['host'], spec['port'], conn, response)
+    encoding = normalize_encoding(response.getheader('Content-Encoding'))
+    wire_bytes = len(response_data)
+    response_data = decode_body(response_data, encoding)
+    _record_body_bytes(endpoint_key, encoding, wire_bytes, len(response_data))
+    return response.status, response_data.decode('utf-8'), response.getheader('Retry-After')
+
+
+_END = object()
+
+
+class StreamedResponse:
+    """
+    جسم رد ناجح يُقرأ تدريجياً من المقبس: عناصر المصفوفة spec['stream_key'] واحداً تلو الآخر،
+    بعد تطبيق spec['transform'] على كل عنصر فور تحليله. الذاكرة المستخدمة = دفعة قراءة واحدة
+    + العنصر الحالي، بدلاً من bytes الرد ونصه ونسخة السجل وشجرة dict كاملة.
+    لا يستخدم env، لذا يمكن قراءته من خيوط make_requests. الاتصال يعود للمجمع فقط إن قُرئ الرد كاملاً.
+    """
+
+    def __init__(self, spec, conn, response):
+        self.spec = spec
+        self.conn = conn
+        self.response = response
+        self.encoding = normalize_encoding(response.getheader('Content-Encoding'))
+        self.items = None  # العناصر بعد collect()
+        self.count = 0
+        self.bytes = 0  # بعد فك الضغط
+        self.wire_bytes = 0
+        self.parse_seconds = 0.0  # زمن المحلل فقط، ليقارن JSON_DECODE_SECONDS بالمسار المقروء كاملاً
+        self._read_seconds = 0.0  # القراءة من المقبس وفك الضغط (تُطرح من زمن المحلل)
+
+    def _wire_chunks(self):
+        while True:
+            chunk = self.response.read(DEFAULT_CHUNK_BYTES)
+            if not chunk:
+                return
+            self.wire_bytes += len(chunk)
+            yield chunk
+
+    def _chunks(self):
+        chunks = iter_decoded(self._wire_chunks(), self.encoding)
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            self._read_seconds += time.perf_counter() - started
+            if chunk is None:
+                return
+            self.bytes += len(chunk)
+            yield chunk
+
+    def _timed_items(self):
+        """ عناصر المحلل مع قياس زمنه وحده (بدون القراءة وفك الضغط وبدون transform والمستهلك) """
+        items = iter_array_items(self._chunks(), self.spec['stream_key'])
+        while True:
+            read_before = self._read_seconds
+            started = time.perf_counter()
+            item = next(items, _END)
+            self.parse_seconds += time.perf_counter() - started - (self._read_seconds - read_before)
+            if item is _END:
+                return
+            yield item
+
+    def __iter__(self):
+        spec = self.spec
+        transform = spec.get('transform')
+        try:
+            for item in self._timed_items():
+                self.count += 1
+                yield transform(item) if transform else item
+        except (OSError, http.client.HTTPException):
+            # انقطاع أو مهلة أثناء قراءة الجسم
+            get_breaker(spec['endpoint_key']).record_failure(spec['breaker_threshold'])
+            raise
+        finally:
+            POOL.finish(spec['scheme'], spec['host'], spec['port'], self.conn, self.response)
+            _record_body_bytes(spec['endpoint_key'], self.encoding, self.wire_bytes, self.bytes)
+            JSON_DECODE_SECONDS.observe(self.parse_seconds, endpoint=spec['endpoint_key'])
+
+    def collect(self):
+        self.items = list(self)
+        return self
+
+    def summary(self):
+        return (
+            f"\n=== RESPONSE ===\nStatus: {self.response.status}\n"
+            f"Body: [streamed {self.count} items, {self.bytes} bytes, {self.wire_bytes} bytes {self.encoding}]"
+        )
+
+
+def _record_body_bytes(endpoint_key, encoding, wire_bytes, decoded_bytes):
+    """ حجم الرد قبل وبعد فك الضغط لكل Endpoint (نسبة الضغط = decoded / wire) """
+    UPSTREAM_RESPONSE_BYTES.observe(decoded_bytes, endpoint=endpoint_key)
+    UPSTREAM_WIRE_BYTES.inc(wire_bytes, endpoint=endpoint_key, encoding=encoding)
+    UPSTREAM_DECODED_BYTES.inc(decoded_bytes, endpoint=endpoint_key, encoding=encoding)
+
+
+def _submit_bounded(prepared, limit):
+    """
+    إرسال الطلبات عبر الـ Thread Pool المشترك بحد أقصى limit طلباً قيد التنفيذ في نفس الوقت:
+    الطلب التالي لا يُرسل للـ Pool إلا بعد اكتمال أحد الجارية، فلا تشغل الطلبات المنتظرة
+    خيوط الـ Pool التي تحتاجها الطلبات المتزامنة الأخرى في نفس الـ Worker.
+    يعيد {index: future} بعد اكتمالها كلها.
+    """
+    executor = _get_executor()
+    waiting = deque(prepared)
+    submitted = {}
+    running = set()
+    while waiting or running:
+        while waiting and len(running) < limit:
+            index, spec = waiting.popleft()
+            submitted[index] = executor.submit(_send_collected, spec)
+            running.add(submitted[index])
+        _done, running = wait(running, return_when=FIRST_COMPLETED)
+    return submitted
+
+
+def _get_executor():
+    """ Thread Pool واحد لكل عملية (يُنشأ من جديد بعد fork) """
+    global _EXECUTOR, _EXECUTOR_PID
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None or _EXECUTOR_PID != os.getpid():
+            _EXECUTOR = ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS, thread_name_prefix='liteapi')
+            _EXECUTOR_PID = os.getpid()
+        return _EXECUTOR
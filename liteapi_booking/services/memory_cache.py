@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    كاش داخل الذاكرة (لكل Worker) بحد أقصى للحجم بالبايت وانتهاء صلاحية لكل عنصر.
+    القيم تُخزن كما هي (كائنات Python مفكوكة)، لذا يجب معاملتها كقراءة فقط.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at <= now:
+                self._pop(key)
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size, ttl):
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, size, time.monotonic() + ttl)
+            self._size += size
+            # إخراج الأقدم استخداماً حتى نعود تحت الحد المسموح
+            while self._size > self.max_bytes and self._data:
+                oldest = next(iter(self._data))
+                self._pop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def _pop(self, key):
+        _value, size, _expires_at = self._data.pop(key)
+        self._size -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._data),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+            }
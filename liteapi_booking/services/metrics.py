@@ -0,0 +1,156 @@
+import functools
+import os
+import threading
+import time
+
+# حدود الـ Buckets للمدرجات التكرارية (Histograms)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Metric:
+    """
+    مقياس داخل ذاكرة الـ Worker بتسميات (labels) ثابتة الترتيب.
+    القيم تخص العملية الحالية فقط (تُصفَّر بعد fork).
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+        self._pid = os.getpid()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._series = {}
+            self._pid = os.getpid()
+
+    def _format_labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def render(self):
+        with self._lock:
+            self._check_fork()
+            series = {key: list(value) if isinstance(value, list) else value for key, value in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key in sorted(series):
+            lines.extend(self._render_series(key, series[key]))
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._check_fork()
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{self._format_labels(key)} {value}"]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._check_fork()
+            # [عدادات الـ buckets..., +Inf, sum]
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def _render_series(self, key, series):
+        lines = []
+        for bound, count in zip(self.buckets, series):
+            lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', repr(float(bound)))])} {count}")
+        lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', '+Inf')])} {series[-2]}")
+        lines.append(f"{self.name}_sum{self._format_labels(key)} {series[-1]}")
+        lines.append(f"{self.name}_count{self._format_labels(key)} {series[-2]}")
+        return lines
+
+
+REGISTRY = []
+
+UPSTREAM_LATENCY = Histogram(
+    'liteapi_upstream_latency_seconds', 'LiteAPI request latency per attempt.', ['endpoint'])
+UPSTREAM_REQUESTS = Counter(
+    'liteapi_upstream_requests_total', 'LiteAPI request attempts by outcome (HTTP status or error type).', ['endpoint', 'status'])
+UPSTREAM_REQUEST_BYTES = Histogram(
+    'liteapi_upstream_request_bytes', 'LiteAPI request body size.', ['endpoint'], buckets=BYTES_BUCKETS)
+UPSTREAM_RESPONSE_BYTES = Histogram(
+    'liteapi_upstream_response_bytes', 'LiteAPI response body size after decompression.', ['endpoint'], buckets=BYTES_BUCKETS)
+UPSTREAM_WIRE_BYTES = Counter(
+    'liteapi_upstream_response_wire_bytes_total', 'LiteAPI response bytes as received (compressed when encoding is not identity).', ['endpoint', 'encoding'])
+UPSTREAM_DECODED_BYTES = Counter(
+    'liteapi_upstream_response_decoded_bytes_total', 'LiteAPI response bytes after decompression.', ['endpoint', 'encoding'])
+JSON_DECODE_SECONDS = Histogram(
+    'liteapi_json_decode_seconds', 'Time spent parsing LiteAPI response bodies.', ['endpoint'])
+ROUTE_LATENCY = Histogram(
+    'liteapi_route_latency_seconds', 'Website route handling time.', ['route'])
+ROUTE_SQL_QUERIES = Histogram(
+    'liteapi_route_sql_queries', 'SQL queries executed per website route request.', ['route'], buckets=COUNT_BUCKETS)
+
+
+def timed_route(route):
+    """
+    مزخرف لدوال الـ Controller (يوضع تحت @http.route): زمن المعالجة وعدد استعلامات SQL.
+    Odoo يعد الاستعلامات في threading.current_thread().query_count لكل طلب.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            thread = threading.current_thread()
+            queries_before = getattr(thread, 'query_count', 0)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                ROUTE_LATENCY.observe(time.perf_counter() - started, route=route)
+                ROUTE_SQL_QUERIES.observe(getattr(thread, 'query_count', 0) - queries_before, route=route)
+        return wrapper
+    return decorator
+
+
+def render_metrics():
+    """ كل المقاييس بصيغة Prometheus النصية (text exposition format 0.0.4) """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def render_stats(name, documentation, kind, samples):
+    """ أسطر Prometheus لمقياس مشتق من قاموس إحصائيات: samples = [(labels dict, value), ...] """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return lines
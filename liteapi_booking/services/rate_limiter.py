@@ -0,0 +1,182 @@
+import logging
+import math
+import os
+import threading
+import time
+from odoo import models, api
+
+_logger = logging.getLogger(__name__)
+
+# الحدود الافتراضية لكل مسار: (طلبات في الدقيقة، أقصى دفعة متتالية)
+DEFAULT_LIMITS = {
+    'search': (30, 10),
+    'prebook': (10, 5),
+}
+# عنوان IP واحد قد يخدم عدة مستخدمين (NAT / شبكة شركة)، لذا حده أوسع
+DEFAULT_IP_FACTOR = 5
+# أقصى عدد مفاتيح في الذاكرة لكل Worker قبل حذف الدلاء الممتلئة
+MAX_LOCAL_KEYS = 50000
+# الدلاء التي لم تُستخدم منذ هذه المدة (ثواني) تُحذف من الجدول المشترك
+SHARED_BUCKET_IDLE_SECONDS = 3600
+
+RATE_LIMIT_STATS = {'allowed': 0, 'rejected': 0, 'shared_errors': 0, 'rejected_by': {}}
+
+
+class TokenBuckets:
+    """
+    دلاء رموز (Token Bucket) داخل ذاكرة الـ Worker.
+    كل مفتاح يمتلئ بمعدل rate رمز/ثانية حتى burst، وكل طلب يستهلك رمزاً واحداً.
+    """
+
+    def __init__(self, max_keys=MAX_LOCAL_KEYS):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def take(self, key, rate, burst):
+        """ يعيد 0 إن سُمح بالطلب، وإلا عدد الثواني حتى يتوفر رمز """
+        now = time.monotonic()
+        with self._lock:
+            if self._pid != os.getpid():
+                self._buckets = {}
+                self._pid = os.getpid()
+            tokens, updated, _full_at = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return wait
+
+    def _prune(self, now):
+        # الدلو الممتلئ يساوي دلواً جديداً، فحذفه لا يغير النتيجة
+        for key in [key for key, entry in self._buckets.items() if entry[2] <= now]:
+            del self._buckets[key]
+
+
+BUCKETS = TokenBuckets()
+
+
+class RateLimiter(models.AbstractModel):
+    _name = 'liteapi.rate.limiter'
+    _description = 'LiteAPI Request Rate Limiter'
+
+    def init(self):
+        # جدول الوضع المشترك بين الـ Workers؛ UNLOGGED لأنه بيانات مؤقتة لا تحتاج WAL
+        self.env.cr.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS liteapi_rate_bucket (
+                key varchar PRIMARY KEY,
+                tokens double precision NOT NULL,
+                rate double precision NOT NULL,
+                burst double precision NOT NULL,
+                updated_at timestamp NOT NULL
+            )
+        """)
+
+    @api.model
+    def _get_limits(self, name):
+        ICP = self.env['ir.config_parameter'].sudo()
+        per_minute, burst = DEFAULT_LIMITS[name]
+        per_minute = float(ICP.get_param(f'liteapi.ratelimit_{name}_per_minute', per_minute))
+        burst = float(ICP.get_param(f'liteapi.ratelimit_{name}_burst', burst))
+        ip_factor = float(ICP.get_param('liteapi.ratelimit_ip_factor', DEFAULT_IP_FACTOR))
+        return per_minute / 60.0, burst, ip_factor
+
+    @api.model
+    def check(self, name, session_id=None, user_id=None, ip=None):
+        """
+        فحص حدود المسار name لكل من الجلسة والمستخدم وعنوان IP.
+        يعيد 0 إن سُمح بالطلب، وإلا عدد الثواني المقترح لـ Retry-After.
+
+        المسار السريع محلي في الذاكرة. في الوضع المشترك (liteapi.ratelimit_shared)
+        يُستشار جدول Postgres بعده: الدلو المحلي لا يرى إلا جزءاً من الطلبات،
+        فإن كان فارغاً فالمشترك فارغ حتماً ولا حاجة لقاعدة البيانات.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        if ICP.get_param('liteapi.ratelimit_enabled', 'True').lower() not in ('1', 'true'):
+            return 0
+
+        rate, burst, ip_factor = self._get_limits(name)
+        if rate <= 0:
+            return 0
+        scopes = []
+        if session_id:
+            scopes.append(('session', f"{name}:s:{session_id}", rate, burst))
+        if user_id:
+            scopes.append(('user', f"{name}:u:{user_id}", rate, burst))
+        if ip:
+            scopes.append(('ip', f"{name}:ip:{ip}", rate * ip_factor, burst * ip_factor))
+
+        dbname = self.env.cr.dbname
+        for scope, key, scope_rate, scope_burst in scopes:
+            wait = BUCKETS.take((dbname, key), scope_rate, scope_burst)
+            if wait:
+                return self._reject(name, scope, wait)
+
+        if scopes and ICP.get_param('liteapi.ratelimit_shared', 'False').lower() in ('1', 'true'):
+            rejected = self._take_shared(scopes)
+            if rejected:
+                scope, _key, scope_rate, _burst = rejected
+                return self._reject(name, scope, 1 / scope_rate)
+
+        RATE_LIMIT_STATS['allowed'] += 1
+        return 0
+
+    @api.model
+    def _take_shared(self, scopes):
+        """
+        استهلاك رمز من كل دلو مشترك بأمر SQL واحد (إعادة الملء تُحسب داخل Postgres).
+        يعيد أول نطاق مرفوض أو None. عند خطأ قاعدة البيانات يُسمح بالطلب (fail open).
+        """
+        keys = [key for _scope, key, _rate, _burst in scopes]
+        try:
+            # cursor مستقل يُثبَّت فوراً، حتى لا يبقى قفل الصف طوال مدة الطلب
+            with self.env.registry.cursor() as cr:
+                cr.execute("""
+                    INSERT INTO liteapi_rate_bucket AS b (key, tokens, rate, burst, updated_at)
+                    SELECT k, burst - 1, rate, burst, clock_timestamp()
+                    FROM unnest(%s::varchar[], %s::float8[], %s::float8[]) AS t(k, rate, burst)
+                    ON CONFLICT (key) DO UPDATE SET
+                        tokens = LEAST(EXCLUDED.burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * EXCLUDED.rate) - 1,
+                        rate = EXCLUDED.rate,
+                        burst = EXCLUDED.burst,
+                        updated_at = clock_timestamp()
+                    WHERE LEAST(EXCLUDED.burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * EXCLUDED.rate) >= 1
+                    RETURNING key
+                """, (keys, [s[2] for s in scopes], [s[3] for s in scopes]))
+                allowed = {row[0] for row in cr.fetchall()}
+        except Exception as e:
+            RATE_LIMIT_STATS['shared_errors'] += 1
+            _logger.warning(f"Shared rate limit check failed, allowing request: {e}")
+            return None
+        for scope in scopes:
+            if scope[1] not in allowed:
+                return scope
+        return None
+
+    @api.model
+    def _reject(self, name, scope, wait):
+        RATE_LIMIT_STATS['rejected'] += 1
+        by_scope = RATE_LIMIT_STATS['rejected_by']
+        by_scope[f"{name}:{scope}"] = by_scope.get(f"{name}:{scope}", 0) + 1
+        _logger.warning(f"🚦 Rate limit: {name} rejected by {scope} limit (retry in {wait:.1f}s)")
+        return max(1, math.ceil(wait))
+
+    @api.model
+    def get_stats(self):
+        stats = dict(RATE_LIMIT_STATS)
+        stats['rejected_by'] = dict(RATE_LIMIT_STATS['rejected_by'])
+        return stats
+
+    @api.model
+    def _cron_gc_buckets(self):
+        self.env.cr.execute(
+            "DELETE FROM liteapi_rate_bucket WHERE updated_at < clock_timestamp() - %s * interval '1 second'",
+            (SHARED_BUCKET_IDLE_SECONDS,)
+        )
+        _logger.info(f"🧹 GC liteapi_rate_bucket: deleted {self.env.cr.rowcount} idle buckets")
@@ -0,0 +1,63 @@
+import email.utils
+import random
+import threading
+import time
+
+# ردود مؤقتة تستحق إعادة المحاولة (إذا كان الطلب آمناً للتكرار)
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+
+DEFAULT_MAX_RETRIES = 2
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 4.0
+# أطول Retry-After نقبل انتظاره داخل طلب المستخدم؛ الأطول يُعاد خطأً فوراً
+MAX_RETRY_AFTER_SECONDS = 5.0
+
+# ميزانية إعادة المحاولة: كل طلب يضيف RETRY_RATIO رصيداً، وكل إعادة تستهلك 1،
+# فلا تتجاوز الإعادات ~10% من الطلبات عند تعطل الـ API (لا نضاعف الحمل عليه)
+RETRY_RATIO = 0.1
+RETRY_BUDGET_CAP = 10.0
+
+
+class RetryBudget:
+
+    def __init__(self, ratio=RETRY_RATIO, cap=RETRY_BUDGET_CAP):
+        self.ratio = ratio
+        self.cap = cap
+        self._balance = cap
+        self._lock = threading.Lock()
+        self.stats = {'retries': 0, 'exhausted': 0}
+
+    def deposit(self):
+        with self._lock:
+            self._balance = min(self.cap, self._balance + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._balance < 1:
+                self.stats['exhausted'] += 1
+                return False
+            self._balance -= 1
+            self.stats['retries'] += 1
+            return True
+
+
+RETRY_BUDGET = RetryBudget()
+
+
+def backoff_delay(attempt):
+    """ Exponential backoff مع Full Jitter: عشوائي بين 0 و min(cap, base * 2^attempt) """
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def parse_retry_after(value):
+    """ قيمة Retry-After بالثواني (رقم أو تاريخ HTTP)، أو None """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
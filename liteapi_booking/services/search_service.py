@@ -1,12 +1,83 @@
-import json
+import itertools
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
 from odoo import models, api, fields, _
 from odoo.exceptions import UserError
 from odoo.tools import html2plaintext
 
+from . import json_codec
+from .memory_cache import LRUCache
+
 _logger = logging.getLogger(__name__)
 
+# مدة صلاحية نتائج البحث (ثواني)
+CACHE_TTL_SECONDS = 90
+
+# أقصى عدد معرفات فنادق في طلب /hotels/rates واحد، وعدد الطلبات المتوازية لبحث المدينة
+HOTEL_IDS_PER_REQUEST = 100
+DEFAULT_CHUNK_WORKERS = 4
+
+# المستوى الأول (L1): كاش LRU داخل ذاكرة كل Worker أمام جدول liteapi.search.cache (L2)
+L1_CACHE = LRUCache()
+L2_STATS = {'hits': 0, 'misses': 0, 'stale': 0}
+
+# Stale-While-Revalidate: المدة الافتراضية (ثواني) بعد انتهاء الصلاحية التي نقدم فيها الكاش القديم فوراً
+DEFAULT_SWR_SECONDS = CACHE_TTL_SECONDS
+
+# Single-flight: أقصى مدة لانتظار نتيجة طلب مماثل قيد التنفيذ (أكبر من مهلة العميل 45 ثانية)
+COALESCE_WAIT_SECONDS = 50
+COALESCE_POLL_SECONDS = 0.2
+
+
+class _Flight:
+    """ طلب API قيد التنفيذ لمفتاح كاش معين داخل هذا الـ Worker """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+_INFLIGHT = {}
+_INFLIGHT_LOCK = threading.Lock()
+_REFRESHING = set()
+
+# الحقول التي تستخدمها بطاقات النتائج من كل عنصر في رد /hotels/rates (الباقي، وأكبره roomTypes، يُهمل)
+RATES_ITEM_FIELDS = (
+    'hotelId', 'id', 'name', 'address', 'description', 'hotelDescription',
+    'starRating', 'stars', 'main_photo', 'thumbnail', 'reviewScore', 'score',
+)
+
+
+def _lowest_price(item):
+    rates = list(item.get('rates', []) or [])
+
+    # التعامل مع اختلاف هيكلية الرد في بعض الحالات
+    if not rates and item.get('roomTypes'):
+        for rt in item.get('roomTypes'):
+            rates.extend(rt.get('rates', []))
+
+    prices = [
+        r.get('retailPrice', {}).get('amount') or
+        r.get('retailRate', {}).get('total', [{}])[0].get('amount')
+        for r in rates
+    ]
+    prices = [p for p in prices if p]
+    return min(prices) if prices else 0.0
+
+
+def slim_rates_item(item):
+    """
+    نسخة مصغرة من عنصر /hotels/rates تُحسب فور تحليله من الرد المتدفق:
+    أقل سعر + الحقول المعروضة فقط، فلا تبقى غرف الفندق وأسعارها في الذاكرة.
+    """
+    slim = {key: item[key] for key in RATES_ITEM_FIELDS if key in item}
+    if item.get('hotelImages'):
+        slim['hotelImages'] = item['hotelImages'][:1]
+    slim['lowestPrice'] = _lowest_price(item)
+    return slim
+
 class SearchService(models.AbstractModel):
     _name = 'liteapi.search.service'
     _description = 'LiteAPI Search Handler'
@@ -19,21 +90,214 @@ class SearchService(models.AbstractModel):
         # مفتاح البحث للكاش
         cache_key = f"{search_type}|{search_value}|{checkin}|{checkout}|{guests}|{user_lang}"
         
-        # 1. محاولة جلب كاش "طازج" (ساري المفعول - دقيقة واحدة)
-        cached_result = self._get_from_cache(cache_key, expired=False)
-        if cached_result:
-            return json.loads(cached_result)
+        # 1. محاولة جلب كاش "طازج" من الذاكرة أولاً (بدون قاعدة بيانات ولا json.loads)
+        l1_key = self._l1_key(cache_key)
+        cached_result = L1_CACHE.get(l1_key)
+        if cached_result is not None:
+            self._log_search(search_type, cache_key, cache_hit=True)
+            return cached_result
+
+        # 2. ثم من جدول الكاش المشترك بين الـ Workers (L2)
+        cache_entry = self._get_cache_entry(cache_key, expired=False)
+        if cache_entry:
+            L2_STATS['hits'] += 1
+            result = json_codec.loads(cache_entry.response_json)
+            remaining = (cache_entry.expires_at - fields.Datetime.now()).total_seconds()
+            self._configure_l1()
+            L1_CACHE.set(l1_key, result, len(cache_entry.response_json), remaining)
+            self._log_search(search_type, cache_key, cache_hit=True)
+            return result
+        L2_STATS['misses'] += 1
+
+        # 3. Stale-While-Revalidate: كاش منتهي حديثاً يُقدَّم فوراً ويُحدَّث في الخلفية
+        swr_seconds = int(self.env['ir.config_parameter'].sudo().get_param(
+            'liteapi.search_swr_seconds', DEFAULT_SWR_SECONDS))
+        if swr_seconds > 0:
+            stale_entry = self._get_cache_entry(cache_key, expired=True)
+            if stale_entry and stale_entry.expires_at > fields.Datetime.now() - timedelta(seconds=swr_seconds):
+                L2_STATS['stale'] += 1
+                self._schedule_refresh(
+                    search_type, search_value, checkin, checkout, guests, cache_key,
+                    api_lang_code, user_lang
+                )
+                self._log_search(search_type, cache_key, cache_hit=True)
+                return json_codec.loads(stale_entry.response_json)
 
-        # 2. إذا لم يوجد، نطلب من API (البحث الكامل للحصول على الصور والتفاصيل)
-        return self._fetch_from_api_and_cache(
+        # الـ API متعطل (الدائرة مفتوحة): الكاش القديم بأي عمر فوراً بدلاً من انتظار طلب سيُرفض
+        if self.env['liteapi.client'].is_circuit_open(self._search_endpoint(search_type, search_value)):
+            _logger.warning(f"⚡ Circuit open, serving stale cache for {cache_key}")
+            self._log_search(search_type, cache_key, cache_hit=False)
+            return self._stale_or_empty(cache_key)
+
+        # 4. إذا لم يوجد، نطلب من API (البحث الكامل للحصول على الصور والتفاصيل)
+        # مع دمج الطلبات المتطابقة المتزامنة في طلب واحد (Single-Flight)
+        self._log_search(search_type, cache_key, cache_hit=False)
+        return self._fetch_single_flight(
             search_type, search_value, checkin, checkout, guests, cache_key, 
             api_lang_code, user_lang
         )
 
     @api.model
-    def _get_from_cache(self, cache_key, expired=False):
+    def _search_endpoint(self, search_type, search_value):
+        """ الـ Endpoint الذي سيستخدمه _fetch_from_api_and_cache لهذا البحث """
+        mode = self.env['ir.config_parameter'].sudo().get_param('liteapi.search_mode', 'full')
+        if mode == 'min_rates' and search_type not in ('vibe', 'place') and str(search_value).isdigit():
+            return '/hotels/min-rates'
+        return '/hotels/rates'
+
+    @api.model
+    def _log_search(self, search_type, cache_key, cache_hit):
+        """ حدث بحث واحد في سجل التدقيق (لعدادات لوحة التحكم وتقرير إساءة الاستخدام) """
+        self.env['liteapi.client']._log_call(f"Search: {search_type}", 'success', details=cache_key, cache_hit=cache_hit)
+
+    @api.model
+    def _schedule_refresh(self, search_type, search_value, checkin, checkout, guests, cache_key, api_lang, full_lang_code):
+        """
+        تحديث الكاش في خيط خلفي بـ cursor مستقل، حتى لا ينتظر المستخدم الـ API.
+        خيط واحد فقط لكل مفتاح داخل الـ Worker، والـ advisory lock يمنع التكرار بين الـ Workers.
+        التحديث الخلفي يجلب دائماً كل دفعات بحث المدينة (liteapi_search_full)، لأن النتيجة الجزئية
+        لا تُخزن، ولأن هذا الخيط نفسه يحجز المفتاح فلا يمكنه جدولة تحديث كامل بعدها.
+        """
+        l1_key = self._l1_key(cache_key)
+        with _INFLIGHT_LOCK:
+            if l1_key in _REFRESHING:
+                return
+            _REFRESHING.add(l1_key)
+
+        registry = self.env.registry
+        dbname = self.env.cr.dbname
+        uid = self.env.uid
+        su = self.env.su
+        context = dict(self.env.context, liteapi_search_full=True)
+
+        def refresh():
+            threading.current_thread().dbname = dbname
+            try:
+                with registry.cursor() as cr:
+                    # نفس صلاحيات المستدعي (الـ Controllers تستدعي الخدمة بـ sudo، وعميل البوابة لا يقرأ الفنادق بدونه)
+                    env = api.Environment(cr, uid, context, su=su)
+                    env['liteapi.search.service']._fetch_with_advisory_lock(
+                        search_type, search_value, checkin, checkout, guests, cache_key,
+                        api_lang, full_lang_code
+                    )
+                _logger.info(f"🔄 Background refresh done for {cache_key}")
+            except Exception:
+                _logger.exception(f"Background refresh failed for {cache_key}")
+            finally:
+                with _INFLIGHT_LOCK:
+                    _REFRESHING.discard(l1_key)
+
+        threading.Thread(target=refresh, name=f"liteapi-swr-{dbname}", daemon=True).start()
+
+    @api.model
+    def _fetch_single_flight(self, search_type, search_value, checkin, checkout, guests, cache_key, api_lang, full_lang_code):
+        """
+        طلب واحد فقط للـ API لكل مفتاح كاش في نفس الوقت:
+        - داخل الـ Worker: الخيوط الأخرى تنتظر نتيجة الخيط القائد (threading.Event).
+        - بين الـ Workers: Postgres advisory lock على hash المفتاح؛ من لا يحصل عليه ينتظر ظهور النتيجة في L2.
+        """
+        l1_key = self._l1_key(cache_key)
+        with _INFLIGHT_LOCK:
+            flight = _INFLIGHT.get(l1_key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _INFLIGHT[l1_key] = _Flight()
+
+        if not is_leader:
+            _logger.info(f"⏳ Waiting for in-flight search: {cache_key}")
+            if flight.event.wait(COALESCE_WAIT_SECONDS) and flight.result is not None:
+                return flight.result
+            # القائد لم ينته في المهلة: الكاش القديم إن وجد، وإلا طلبنا الخاص (عبر نفس الـ advisory lock)
+            stale_cache = self._get_from_cache(cache_key, expired=True)
+            if stale_cache:
+                return json_codec.loads(stale_cache)
+            return self._fetch_with_advisory_lock(
+                search_type, search_value, checkin, checkout, guests, cache_key, api_lang, full_lang_code
+            )
+
+        try:
+            flight.result = self._fetch_with_advisory_lock(
+                search_type, search_value, checkin, checkout, guests, cache_key, api_lang, full_lang_code
+            )
+            return flight.result
+        finally:
+            flight.event.set()
+            with _INFLIGHT_LOCK:
+                _INFLIGHT.pop(l1_key, None)
+
+    @api.model
+    def _fetch_with_advisory_lock(self, search_type, search_value, checkin, checkout, guests, cache_key, api_lang, full_lang_code):
+        lock_name = f"liteapi.search:{cache_key}"
+        # cursor مستقل (غير معاملة الطلب الحالي) يحمل القفل ثم يحفظ الكاش نفسه:
+        # قفل على مستوى المعاملة يتحرر مع commit الحفظ، فلا نحتاج اتصالاً ثالثاً بقاعدة البيانات
+        with self.env.registry.cursor() as cache_cr:
+            deadline = time.monotonic() + COALESCE_WAIT_SECONDS
+            while True:
+                cache_cr.execute("SELECT pg_try_advisory_xact_lock(hashtext(%s))", (lock_name,))
+                locked = cache_cr.fetchone()[0]
+                # Worker آخر (أو سبقنا) ربما حفظ النتيجة للتو
+                cached = self._read_fresh_cache(cache_cr, cache_key)
+                if cached is not None or locked or time.monotonic() > deadline:
+                    break
+                cache_cr.rollback()  # snapshot جديد في المحاولة التالية (لا نملك القفل بعد)
+                time.sleep(COALESCE_POLL_SECONDS)
+
+            if cached is not None:
+                return cached
+            # المعاملة تبقى مفتوحة أثناء طلب الـ API إن حصلنا على القفل؛ الخروج من with يحررها في كل الحالات
+            return self._fetch_from_api_and_cache(
+                search_type, search_value, checkin, checkout, guests, cache_key,
+                api_lang, full_lang_code, cache_cr=cache_cr
+            )
+
+    @api.model
+    def _read_fresh_cache(self, cr, cache_key):
+        cr.execute("""
+            SELECT response_json, expires_at FROM liteapi_search_cache
+            WHERE cache_key = %s AND expires_at > (now() at time zone 'UTC')
+        """, (cache_key,))
+        row = cr.fetchone()
+        if not row:
+            return None
+        result = json_codec.loads(row[0])
+        remaining = (row[1] - fields.Datetime.now()).total_seconds()
+        self._configure_l1()
+        L1_CACHE.set(self._l1_key(cache_key), result, len(row[0]), remaining)
+        return result
+
+    @api.model
+    def _save_to_cache(self, vals, cache_cr=None):
+        """
+        حفظ الكاش عبر cursor مستقل يُثبَّت فوراً، لتصبح النتيجة مرئية للـ Workers
+        المنتظرين قبل انتهاء معاملة الطلب الحالي.
+        cache_cr: cursor القفل من _fetch_with_advisory_lock؛ الـ commit يحرر القفل أيضاً.
+        """
+        if cache_cr is not None:
+            self.env(cr=cache_cr)['liteapi.search.cache']._upsert(vals)
+            cache_cr.commit()
+            return
+        with self.env.registry.cursor() as cr:
+            self.env(cr=cr)['liteapi.search.cache']._upsert(vals)
+
+    @api.model
+    def _l1_key(self, cache_key):
+        # نفس الـ Worker قد يخدم أكثر من قاعدة بيانات
+        return (self.env.cr.dbname, cache_key)
+
+    @api.model
+    def _configure_l1(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        L1_CACHE.max_bytes = int(ICP.get_param('liteapi.search_cache_l1_bytes', 32 * 1024 * 1024))
+
+    @api.model
+    def get_cache_stats(self):
+        """ عدادات الكاش لهذا الـ Worker (L1 في الذاكرة + L2 في الجدول) """
+        return {'l1': L1_CACHE.stats(), 'l2': dict(L2_STATS)}
+
+    @api.model
+    def _get_cache_entry(self, cache_key, expired=False):
         """
-        جلب الكاش.
+        جلب سجل الكاش من قاعدة البيانات (L2).
         expired=False: يجلب فقط الساري (لمنع التكرار في نفس الدقيقة).
         expired=True: يجلب أحدث سجل حتى لو منتهي (للاستخدام عند فشل الـ API).
         """
@@ -42,7 +306,11 @@ class SearchService(models.AbstractModel):
             domain.append(('expires_at', '>', fields.Datetime.now()))
             
         # ترتيب تنازلي لضمان جلب الأحدث دائماً
-        cache_entry = self.env['liteapi.search.cache'].search(domain, order='create_date desc', limit=1)
+        return self.env['liteapi.search.cache'].search(domain, order='create_date desc', limit=1)
+
+    @api.model
+    def _get_from_cache(self, cache_key, expired=False):
+        cache_entry = self._get_cache_entry(cache_key, expired=expired)
         return cache_entry.response_json if cache_entry else False
 
     # ==================================================================================
@@ -54,27 +322,207 @@ class SearchService(models.AbstractModel):
         تنفيذ طلب min-rates للحصول على offerId والسعر فقط (بدون صور أو وصف).
         تستخدم هذه الدالة عندما يكون لديك Hotel IDs وتريد أسرع رد للحجز.
         """
-        client = self.env['liteapi.client']
-        
-        # تجهيز البيانات حسب مواصفات min-rates
+        try:
+            # تأكد من إضافة '/hotels/min-rates' في قائمة ALLOWED_ENDPOINTS في liteapi_client.py
+            hotel_id_chunks = [
+                hotel_ids[i:i + HOTEL_IDS_PER_REQUEST]
+                for i in range(0, len(hotel_ids), HOTEL_IDS_PER_REQUEST)
+            ]
+            return self._fetch_min_rates_chunks(hotel_id_chunks, checkin, checkout, guests, currency=currency)
+
+        except Exception as e:
+            _logger.error(f"Min-Rates Search Error: {e}")
+            return {}
+
+    # ==================================================================================
+    # دالة البحث الكامل (تجلب الصور والوصف + offerId) - تستخدم لصفحة النتائج
+    # ==================================================================================
+    @api.model
+    def _process_rates_items(self, api_data, full_lang_code):
+        """
+        تحويل عناصر رد /hotels/rates إلى بطاقات نتائج البحث.
+        api_data: قائمة أو مولّد (عناصر الرد المتدفق تدخل الحلقة فور تحليلها، كاملة أو مصغرة بـ slim_rates_item).
+        عدد استعلامات SQL ثابت مهما كان عدد الفنادق: بحث واحد لكل الفنادق المحلية
+        وتحديث مجمع واحد للصور/النجوم، والوصف يُكتب فقط عند غيابه للغة الحالية.
+        """
+        priced_items = []
+        for item in api_data:
+            hotel_lite_id = item.get('hotelId') or item.get('id')
+            if not hotel_lite_id: continue
+
+            lowest_price = item['lowestPrice'] if 'lowestPrice' in item else _lowest_price(item)
+
+            if lowest_price > 0:
+                priced_items.append((hotel_lite_id, lowest_price, item))
+
+        if not priced_items:
+            return []
+
+        # 1. استعلام واحد لكل الفنادق المحلية بدلاً من search لكل فندق
+        Hotel = self.env['liteapi.hotel'].sudo().with_context(lang=full_lang_code)
+        local_hotels = Hotel.search([('liteapi_hotel_id', 'in', [h_id for h_id, _p, _i in priced_items])])
+        local_map = {h.liteapi_hotel_id: h for h in local_hotels}
+
+        missing_desc_ids = set()
+        if local_hotels:
+            self.env.cr.execute(
+                "SELECT id FROM liteapi_hotel WHERE id IN %s AND (description IS NULL OR NOT description ? %s)",
+                (tuple(local_hotels.ids), full_lang_code)
+            )
+            missing_desc_ids = {row[0] for row in self.env.cr.fetchall()}
+
+        hotels_list = []
+        plain_updates = []
+        desc_updates = {}
+        for hotel_lite_id, lowest_price, item in priced_items:
+            local_hotel = local_map.get(hotel_lite_id)
+            api_desc = item.get('description') or item.get('hotelDescription') or ""
+            try: api_stars = int(float(item.get('starRating') or item.get('stars') or 0))
+            except (TypeError, ValueError): api_stars = 0
+
+            # تحديث البيانات المحلية (الصور والنجوم والوصف) إذا كانت ناقصة
+            new_image = None
+            if local_hotel:
+                if not local_hotel.image_url:
+                    if item.get('main_photo'): new_image = item.get('main_photo')
+                    elif item.get('thumbnail'): new_image = item.get('thumbnail')
+                    elif item.get('hotelImages'): new_image = item['hotelImages'][0].get('url')
+                new_stars = api_stars if local_hotel.star_rating == 0 and api_stars > 0 else None
+                if new_image or new_stars:
+                    plain_updates.append((local_hotel.id, new_image, new_stars))
+                if api_desc and local_hotel.id in missing_desc_ids:
+                    desc_updates[local_hotel.id] = api_desc
+
+            # تجهيز صورة للعرض
+            image_url = '/web/static/src/img/placeholder.png'
+            if local_hotel and (local_hotel.image_url or new_image):
+                image_url = local_hotel.image_url or new_image
+            elif item.get('main_photo'): image_url = item.get('main_photo')
+            elif item.get('thumbnail'): image_url = item.get('thumbnail')
+            
+            # تجهيز النجوم
+            star_rating = api_stars
+            if local_hotel and local_hotel.star_rating > 0:
+                star_rating = local_hotel.star_rating
+
+            # تجهيز الوصف المختصر
+            short_desc = ""
+            desc_source = api_desc
+            if not desc_source and local_hotel:
+                desc_source = local_hotel.description or ""
+            
+            if desc_source:
+                plain_text = html2plaintext(desc_source).strip()
+                if len(plain_text) > 150:
+                    short_desc = plain_text[:147] + "..."
+                else:
+                    short_desc = plain_text
+
+            hotels_list.append({
+                'id': local_hotel.id if local_hotel else 0,
+                'liteapi_id': hotel_lite_id,
+                'name': item.get('name') or (local_hotel.name if local_hotel else "Unknown Hotel"),
+                'price': lowest_price,
+                'currency': 'SAR',
+                'star_rating': star_rating,
+                'image_url': image_url,
+                'short_description': short_desc,
+                'address': item.get('address'),
+                'review_score': item.get('reviewScore') or item.get('score') or 0,
+                'taxes_included': True
+            })
+
+        # 2. تحديث مجمع واحد للصور والنجوم
+        if plain_updates:
+            self._bulk_backfill_hotels(plain_updates)
+
+        # 3. تحديث مجمع واحد للوصف، فقط أول مرة يظهر فيها الفندق بهذه اللغة
+        if desc_updates:
+            self._bulk_backfill_descriptions(desc_updates, full_lang_code)
+
+        return hotels_list
+
+    @api.model
+    def _bulk_backfill_hotels(self, updates):
+        """ updates: [(hotel_id, image_url or None, star_rating or None)] في UPDATE ... FROM (VALUES ...) واحد """
+        values_sql = ", ".join(["(%s::int, %s::varchar, %s::int)"] * len(updates))
+        params = [value for update in updates for value in update]
+        self.env.cr.execute(f"""
+            UPDATE liteapi_hotel AS h SET
+                image_url = COALESCE(NULLIF(h.image_url, ''), v.image_url),
+                star_rating = CASE WHEN COALESCE(h.star_rating, 0) = 0
+                                   THEN COALESCE(v.star_rating, 0) ELSE h.star_rating END,
+                write_uid = %s,
+                write_date = (now() at time zone 'UTC')
+            FROM (VALUES {values_sql}) AS v(id, image_url, star_rating)
+            WHERE h.id = v.id
+        """, [self.env.uid] + params)
+        self.env['liteapi.hotel'].invalidate_model(['image_url', 'star_rating', 'write_uid', 'write_date'])
+
+    @api.model
+    def _bulk_backfill_descriptions(self, descriptions, lang):
+        """
+        descriptions: {hotel_id: html} تُكتب للغة lang في UPDATE ... FROM (VALUES ...) واحد.
+        الوصف حقل مترجم (jsonb لكل لغة)، والـ HTML يُنظف بنفس تحويل الحقل كما يفعل write،
+        ولأول قيمة تُحفظ أيضاً كقيمة en_US (الاحتياطية) مثل الـ ORM.
+        """
+        Hotel = self.env['liteapi.hotel']
+        field = Hotel._fields['description']
+        values_sql = ", ".join(["(%s::int, %s::text)"] * len(descriptions))
+        params = []
+        for hotel_id, description in descriptions.items():
+            params += [hotel_id, str(field.convert_to_cache(description, Hotel) or '')]
+        self.env.cr.execute(f"""
+            UPDATE liteapi_hotel AS h SET
+                description = CASE WHEN h.description IS NULL
+                                   THEN jsonb_build_object('en_US', v.description, %s::text, v.description)
+                                   ELSE h.description || jsonb_build_object(%s::text, v.description) END,
+                write_uid = %s,
+                write_date = (now() at time zone 'UTC')
+            FROM (VALUES {values_sql}) AS v(id, description)
+            WHERE h.id = v.id AND (h.description IS NULL OR NOT h.description ? %s)
+        """, [lang, lang, self.env.uid] + params + [lang])
+        Hotel.invalidate_model(['description', 'write_uid', 'write_date'])
+
+    @api.model
+    def _stale_or_empty(self, cache_key):
+        # [Fallback] نحاول العودة للكاش القديم إذا كانت النتائج فارغة
+        stale_cache = self._get_from_cache(cache_key, expired=True)
+        if stale_cache:
+            _logger.warning(f"⚠️ API returned empty data. Using stale cache for {cache_key}")
+            return json_codec.loads(stale_cache)
+        return {'hotels': []}
+
+    @api.model
+    def _fetch_min_rates_chunks(self, hotel_id_chunks, checkin, checkout, guests, currency="SAR"):
+        """
+        طلب /hotels/min-rates لكل دفعة معرفات بالتوازي.
+        يعيد {hotel_id: {...}} ويرفع الخطأ الأول فقط إذا فشلت كل الدفعات.
+        """
         payload = {
             "checkin": str(checkin),
             "checkout": str(checkout),
             "currency": currency,
             "guestNationality": "SA", # يمكن جعلها ديناميكية لاحقاً
             "timeout": 10,
-            "hotelIds": hotel_ids, # يجب أن تكون قائمة List of Strings
             "occupancies": [{ "adults": int(guests) }]
         }
+        ICP = self.env['ir.config_parameter'].sudo()
+        workers = int(ICP.get_param('liteapi.search_chunk_workers', DEFAULT_CHUNK_WORKERS))
+        responses = self.env['liteapi.client'].make_requests([
+            {'endpoint': '/hotels/min-rates', 'method': 'POST', 'json': dict(payload, hotelIds=chunk)}
+            for chunk in hotel_id_chunks
+        ], max_workers=workers)
 
-        try:
-            # إرسال الطلب إلى min-rates
-            # تأكد من إضافة '/hotels/min-rates' في قائمة ALLOWED_ENDPOINTS في liteapi_client.py
-            response_data = client.make_request('/hotels/min-rates', method='POST', json=payload)
-            data = response_data.get('data', [])
-            
-            results = {}
-            for item in data:
+        errors = [error for _data, error in responses if error]
+        if errors and len(errors) == len(responses):
+            raise errors[0]
+
+        results = {}
+        for response_data, error in responses:
+            if error:
+                continue
+            for item in response_data.get('data', []) or []:
                 hotel_lite_id = item.get('hotelId')
                 if hotel_lite_id:
                     results[hotel_lite_id] = {
@@ -84,17 +532,74 @@ class SearchService(models.AbstractModel):
                         'currency': currency,
                         'ssp': item.get('suggestedSellingPrice')
                     }
-            return results
+        return results
 
-        except Exception as e:
-            _logger.error(f"Min-Rates Search Error: {e}")
-            return {}
+    @api.model
+    def _build_min_rate_cards(self, min_rates, local_hotels, full_lang_code):
+        """ بطاقات النتائج من الأسعار الدنيا + البيانات المحلية (بدون أي طلب إضافي للـ API) """
+        hotels_list = []
+        local_map = {h.liteapi_hotel_id: h for h in local_hotels.with_context(lang=full_lang_code)}
+        for hotel_lite_id, rate in min_rates.items():
+            local_hotel = local_map.get(hotel_lite_id)
+            if not local_hotel or not rate.get('price'):
+                continue
+
+            short_desc = ""
+            if local_hotel.description:
+                plain_text = html2plaintext(local_hotel.description).strip()
+                short_desc = plain_text[:147] + "..." if len(plain_text) > 150 else plain_text
+
+            hotels_list.append({
+                'id': local_hotel.id,
+                'liteapi_id': hotel_lite_id,
+                'name': local_hotel.name,
+                'price': rate['price'],
+                'currency': rate['currency'],
+                'star_rating': local_hotel.star_rating,
+                'image_url': local_hotel.image_url or '/web/static/src/img/placeholder.png',
+                'short_description': short_desc,
+                'address': None,
+                'review_score': 0,
+                'taxes_included': True
+            })
+        return hotels_list
+
+    @api.model
+    def _stream_rates_enabled(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return ICP.get_param('liteapi.stream_rates', 'True').lower() in ('1', 'true')
 
-    # ==================================================================================
-    # دالة البحث الكامل (تجلب الصور والوصف + offerId) - تستخدم لصفحة النتائج
-    # ==================================================================================
     @api.model
-    def _fetch_from_api_and_cache(self, search_type, search_value, checkin, checkout, guests, cache_key, api_lang, full_lang_code):
+    def _fetch_rates_chunks(self, payload, hotel_id_chunks):
+        """
+        طلب /hotels/rates لكل دفعة معرفات بالتوازي (بعدد خيوط محدود) ودمج العناصر.
+        مع liteapi.stream_rates يُحلل كل رد تدريجياً داخل خيطه ويُصغر كل فندق فور تحليله.
+        فشل بعض الدفعات لا يُسقط البحث؛ فشلها كلها يرفع الخطأ الأول (ليعمل الـ Fallback).
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        workers = int(ICP.get_param('liteapi.search_chunk_workers', DEFAULT_CHUNK_WORKERS))
+        stream = {'stream_key': 'data', 'transform': slim_rates_item} if self._stream_rates_enabled() else {}
+        results = self.env['liteapi.client'].make_requests([
+            dict(stream, endpoint='/hotels/rates', method='POST', json=dict(payload, hotelIds=chunk))
+            for chunk in hotel_id_chunks
+        ], max_workers=workers)
+
+        api_data = []
+        errors = []
+        for response_data, error in results:
+            if error:
+                errors.append(error)
+                continue
+            api_data.extend(response_data.get('data', []) or [])
+
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        if errors:
+            _logger.warning(f"⚠️ {len(errors)}/{len(results)} rate chunks failed: {errors[0]}")
+        return api_data
+
+    @api.model
+    def _fetch_from_api_and_cache(self, search_type, search_value, checkin, checkout, guests, cache_key, api_lang, full_lang_code, cache_cr=None):
         client = self.env['liteapi.client']
         
         payload = {
@@ -108,6 +613,8 @@ class SearchService(models.AbstractModel):
         }
 
         # تحديد نوع البحث وتجهيز Payload
+        hotel_id_chunks = []
+        local_hotels = self.env['liteapi.hotel']
         if search_type == 'vibe' or search_type == 'place':
             payload['aiSearch'] = search_value
         else:
@@ -119,127 +626,79 @@ class SearchService(models.AbstractModel):
                 local_hotels = self.env['liteapi.hotel'].search([('city_id', '=', city.id)])
                 hotel_ids = [str(h.liteapi_hotel_id) for h in local_hotels if h.liteapi_hotel_id]
                 if not hotel_ids: return {'hotels': []}
-                payload['hotelIds'] = hotel_ids[:100] # API limits often apply
+                # الـ API يقبل عدداً محدوداً من المعرفات في الطلب، فنقسمها لدفعات تُطلب بالتوازي
+                hotel_id_chunks = [
+                    hotel_ids[i:i + HOTEL_IDS_PER_REQUEST]
+                    for i in range(0, len(hotel_ids), HOTEL_IDS_PER_REQUEST)
+                ]
             else:
                 payload['aiSearch'] = str(search_value)
 
         try:
-            # محاولة الاتصال بالـ API (Full Rates Endpoint)
-            response_data = client.make_request('/hotels/rates', method='POST', json=payload)
-            hotels_list = []
-            api_data = response_data.get('data', [])
-            
-            # إذا الرد فارغ
-            if not api_data: 
-                # [Fallback] نحاول العودة للكاش القديم إذا كانت النتائج فارغة
-                stale_cache = self._get_from_cache(cache_key, expired=True)
-                if stale_cache:
-                    _logger.warning(f"⚠️ API returned empty data. Using stale cache for {cache_key}")
-                    return json.loads(stale_cache)
-                return {'hotels': []}
-
-            # معالجة البيانات
-            for item in api_data:
-                hotel_lite_id = item.get('hotelId') or item.get('id')
-                if not hotel_lite_id: continue
-
-                lowest_price = 0.0
-                rates = item.get('rates', []) or []
-                
-                # التعامل مع اختلاف هيكلية الرد في بعض الحالات
-                if not rates and item.get('roomTypes'):
-                     for rt in item.get('roomTypes'):
-                         rates.extend(rt.get('rates', []))
+            partial = False
+            ICP = self.env['ir.config_parameter'].sudo()
+            if hotel_id_chunks and ICP.get_param('liteapi.search_mode', 'full') == 'min_rates':
+                # [Two-Phase] المرحلة الأولى: أسعار دنيا خفيفة (/hotels/min-rates) + الاسم والصورة والنجوم من الكاش المحلي.
+                # الأسعار الكاملة بالغرف تُجلب فقط عند فتح صفحة الفندق.
+                min_rates = self._fetch_min_rates_chunks(hotel_id_chunks, checkin, checkout, guests)
+                if not min_rates:
+                    return self._stale_or_empty(cache_key)
+                hotels_list = self._build_min_rate_cards(min_rates, local_hotels, full_lang_code)
+            else:
+                if hotel_id_chunks:
+                    # [اختياري] عرض نتائج الدفعة الأولى فوراً، وإكمال الباقي في الخلفية
+                    stream_first = ICP.get_param('liteapi.search_stream_first_chunk', 'False').lower() in ('1', 'true')
+                    if stream_first and len(hotel_id_chunks) > 1 and not self.env.context.get('liteapi_search_full'):
+                        hotel_id_chunks = hotel_id_chunks[:1]
+                        partial = True
+                    api_data = self._fetch_rates_chunks(payload, hotel_id_chunks)
+                elif self._stream_rates_enabled():
+                    # محاولة الاتصال بالـ API (Full Rates Endpoint) مع تحليل الرد تدريجياً:
+                    # كل فندق يدخل حلقة المعالجة فور وصوله بدل انتظار الرد كاملاً
+                    api_data = client.stream_request(
+                        '/hotels/rates', method='POST', json=payload, transform=slim_rates_item
+                    )
+                    first_item = next(api_data, None)
+                    api_data = itertools.chain([first_item], api_data) if first_item is not None else []
+                else:
+                    # محاولة الاتصال بالـ API (Full Rates Endpoint)
+                    response_data = client.make_request('/hotels/rates', method='POST', json=payload)
+                    api_data = response_data.get('data', [])
                 
-                if rates:
-                    prices = [
-                        r.get('retailPrice', {}).get('amount') or 
-                        r.get('retailRate', {}).get('total', [{}])[0].get('amount') 
-                        for r in rates
-                    ]
-                    prices = [p for p in prices if p]
-                    if prices: lowest_price = min(prices)
-
-                if lowest_price > 0:
-                    local_hotel = self.env['liteapi.hotel'].search([('liteapi_hotel_id', '=', hotel_lite_id)], limit=1)
-                    
-                    api_desc = item.get('description') or item.get('hotelDescription') or ""
-                    
-                    # تحديث البيانات المحلية (الصور والوصف) إذا وجدت بيانات جديدة
-                    if local_hotel:
-                        vals = {}
-                        if not local_hotel.image_url:
-                            if item.get('main_photo'): vals['image_url'] = item.get('main_photo')
-                            elif item.get('thumbnail'): vals['image_url'] = item.get('thumbnail')
-                            elif item.get('hotelImages'): vals['image_url'] = item['hotelImages'][0].get('url')
-                        
-                        api_stars = int(float(item.get('starRating') or item.get('stars') or 0))
-                        if local_hotel.star_rating == 0 and api_stars > 0:
-                            vals['star_rating'] = api_stars
-
-                        if api_desc:
-                            vals['description'] = api_desc
-                            local_hotel.sudo().with_context(lang=full_lang_code).write(vals)
-                        elif vals:
-                            local_hotel.sudo().write(vals)
-
-                    # تجهيز صورة للعرض
-                    image_url = '/web/static/src/img/placeholder.png'
-                    if local_hotel and local_hotel.image_url:
-                        image_url = local_hotel.image_url
-                    elif item.get('main_photo'): image_url = item.get('main_photo')
-                    elif item.get('thumbnail'): image_url = item.get('thumbnail')
-                    
-                    # تجهيز النجوم
-                    star_rating = 0
-                    if local_hotel and local_hotel.star_rating > 0:
-                        star_rating = local_hotel.star_rating
-                    else:
-                        try: star_rating = int(float(item.get('starRating') or item.get('stars') or 0))
-                        except: pass
-
-                    # تجهيز الوصف المختصر
-                    short_desc = ""
-                    desc_source = api_desc
-                    if not desc_source and local_hotel:
-                        desc_source = local_hotel.with_context(lang=full_lang_code).description or ""
-                    
-                    if desc_source:
-                        plain_text = html2plaintext(desc_source).strip()
-                        if len(plain_text) > 150:
-                            short_desc = plain_text[:147] + "..."
-                        else:
-                            short_desc = plain_text
-
-                    hotels_list.append({
-                        'id': local_hotel.id if local_hotel else 0,
-                        'liteapi_id': hotel_lite_id,
-                        'name': item.get('name') or (local_hotel.name if local_hotel else "Unknown Hotel"),
-                        'price': lowest_price,
-                        'currency': 'SAR',
-                        'star_rating': star_rating,
-                        'image_url': image_url,
-                        'short_description': short_desc,
-                        'address': item.get('address'),
-                        'review_score': item.get('reviewScore') or item.get('score') or 0,
-                        'taxes_included': True
-                    })
+                # إذا الرد فارغ
+                if not api_data: 
+                    return self._stale_or_empty(cache_key)
+
+                # معالجة البيانات (استعلام واحد للفنادق المحلية + تحديثات مجمعة)
+                hotels_list = self._process_rates_items(api_data, full_lang_code)
+            hotels_list.sort(key=lambda h: h['price'])
+
+            if partial:
+                # لا نخزن النتيجة الجزئية؛ الخيط الخلفي يخزن النتيجة المدمجة الكاملة
+                self._schedule_refresh(
+                    search_type, search_value, checkin, checkout, guests, cache_key,
+                    api_lang, full_lang_code
+                )
+                return {'hotels': hotels_list, 'partial': True}
 
             final_result = {'hotels': hotels_list}
             
-            # حفظ الكاش الجديد (لمدة دقيقة ونصف)
+            # حفظ الكاش الجديد (لمدة دقيقة ونصف) في الذاكرة وفي الجدول المشترك
+            response_json = json_codec.dumps(final_result)
+            self._configure_l1()
+            L1_CACHE.set(self._l1_key(cache_key), final_result, len(response_json), CACHE_TTL_SECONDS)
             try:
-                expiration_time = fields.Datetime.now() + timedelta(seconds=90)
+                expiration_time = fields.Datetime.now() + timedelta(seconds=CACHE_TTL_SECONDS)
                 
-                self.env['liteapi.search.cache'].create({
+                self._save_to_cache({
                     'cache_key': cache_key,
                     'city_id': int(search_value) if str(search_value).isdigit() else False,
                     'checkin_date': checkin,
                     'checkout_date': checkout,
                     'guests': guests,
-                    'response_json': json.dumps(final_result),
+                    'response_json': response_json,
                     'expires_at': expiration_time 
-                })
+                }, cache_cr=cache_cr)
             except Exception as e:
                 _logger.warning(f"Cache Save Error: {e}")
             
@@ -254,6 +713,6 @@ class SearchService(models.AbstractModel):
              
              if stale_cache:
                  _logger.info(f"✅ Served Stale Cache for: {cache_key}")
-                 return json.loads(stale_cache)
+                 return json_codec.loads(stale_cache)
              
              return {'hotels': []}
\ No newline at end of file